@@ -0,0 +1,27 @@
+import os
+
+import uvicorn
+
+from .websocket.limits import MAX_MESSAGE_SIZE
+
+
+def main():
+    reload = os.getenv("UVICORN_RELOAD", "").lower() in ("1", "true")
+    # Flows and nodes are still stored in process memory, so scaling out
+    # past one worker is opt-in via WEB_CONCURRENCY (pair it with REDIS_URL)
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+    uvicorn.run(
+        f"{__package__}.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws_max_size=MAX_MESSAGE_SIZE,
+        reload=reload,
+        workers=None if reload else workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,63 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
 from ..models import Flow, FlowCreate, FlowUpdate
 from ..services.flow_service import FlowService
 
 router = APIRouter()
 
 
-def get_flow_service() -> FlowService:
-    return FlowService()
-
-
 @router.post("/", response_model=Flow)
-async def create_flow(
+def create_flow(
     flow: FlowCreate,
-    service: FlowService = Depends(get_flow_service)
+    request: Request
 ) -> Flow:
-    return await service.create_flow(flow)
+    service: FlowService = request.app.state.flow_service
+    return service.create_flow(flow)
 
 
-@router.get("/", response_model=List[Flow])
-async def list_flows(
-    service: FlowService = Depends(get_flow_service)
-) -> List[Flow]:
-    return await service.list_flows()
+# Read endpoints return the service's cached JSON instead of re-validating
+# flows against response_model; the schema is still documented via responses.
+@router.get("/", response_class=Response, responses={200: {"model": List[Flow]}})
+def list_flows(
+    request: Request
+) -> Response:
+    service: FlowService = request.app.state.flow_service
+    return Response(service.list_flows_json(), media_type="application/json")
 
 
-@router.get("/{flow_id}", response_model=Flow)
-async def get_flow(
+@router.get("/{flow_id}", response_class=Response, responses={200: {"model": Flow}})
+def get_flow(
     flow_id: str,
-    service: FlowService = Depends(get_flow_service)
-) -> Flow:
-    flow = await service.get_flow(flow_id)
-    if not flow:
+    request: Request
+) -> Response:
+    service: FlowService = request.app.state.flow_service
+    blob = service.get_flow_json(flow_id)
+    if blob is None:
         raise HTTPException(status_code=404, detail="Flow not found")
-    return flow
+    return Response(blob, media_type="application/json")
 
 
 @router.put("/{flow_id}", response_model=Flow)
-async def update_flow(
+def update_flow(
     flow_id: str,
     flow_update: FlowUpdate,
-    service: FlowService = Depends(get_flow_service)
+    request: Request
 ) -> Flow:
-    flow = await service.update_flow(flow_id, flow_update)
+    service: FlowService = request.app.state.flow_service
+    flow = service.update_flow(flow_id, flow_update)
     if not flow:
         raise HTTPException(status_code=404, detail="Flow not found")
     return flow
 
 
 @router.delete("/{flow_id}")
-async def delete_flow(
+def delete_flow(
     flow_id: str,
-    service: FlowService = Depends(get_flow_service)
+    request: Request
 ) -> dict:
-    success = await service.delete_flow(flow_id)
+    service: FlowService = request.app.state.flow_service
+    success = service.delete_flow(flow_id)
     if not success:
         raise HTTPException(status_code=404, detail="Flow not found")
     return {"message": "Flow deleted successfully"}
\ No newline at end of file
@@ -1,60 +1,61 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Request
 from ..models import Node, NodeCreate, NodeUpdate
 from ..services.node_service import NodeService
 
 router = APIRouter()
 
 
-def get_node_service() -> NodeService:
-    return NodeService()
-
-
 @router.post("/", response_model=Node)
-async def create_node(
+def create_node(
     node: NodeCreate,
     flow_id: str,
-    service: NodeService = Depends(get_node_service)
+    request: Request
 ) -> Node:
-    return await service.create_node(node, flow_id)
+    service: NodeService = request.app.state.node_service
+    return service.create_node(node, flow_id)
 
 
 @router.get("/{node_id}", response_model=Node)
-async def get_node(
+def get_node(
     node_id: str,
-    service: NodeService = Depends(get_node_service)
+    request: Request
 ) -> Node:
-    node = await service.get_node(node_id)
+    service: NodeService = request.app.state.node_service
+    node = service.get_node(node_id)
     if not node:
         raise HTTPException(status_code=404, detail="Node not found")
     return node
 
 
 @router.put("/{node_id}", response_model=Node)
-async def update_node(
+def update_node(
     node_id: str,
     node_update: NodeUpdate,
-    service: NodeService = Depends(get_node_service)
+    request: Request
 ) -> Node:
-    node = await service.update_node(node_id, node_update)
+    service: NodeService = request.app.state.node_service
+    node = service.update_node(node_id, node_update)
     if not node:
         raise HTTPException(status_code=404, detail="Node not found")
     return node
 
 
 @router.delete("/{node_id}")
-async def delete_node(
+def delete_node(
     node_id: str,
-    service: NodeService = Depends(get_node_service)
+    request: Request
 ) -> dict:
-    success = await service.delete_node(node_id)
+    service: NodeService = request.app.state.node_service
+    success = service.delete_node(node_id)
     if not success:
         raise HTTPException(status_code=404, detail="Node not found")
     return {"message": "Node deleted successfully"}
 
 
 @router.get("/types/", response_model=List[dict])
-async def get_node_types(
-    service: NodeService = Depends(get_node_service)
+def get_node_types(
+    request: Request
 ) -> List[dict]:
-    return await service.get_available_node_types()
\ No newline at end of file
+    service: NodeService = request.app.state.node_service
+    return service.get_available_node_types()
\ No newline at end of file
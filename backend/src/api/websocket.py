@@ -1,7 +1,9 @@
+import asyncio
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from ..websocket.connection_manager import ConnectionManager
+from ..websocket.limits import READ_TIMEOUT
 from ..websocket.message_handler import MessageHandler
-import json
+import orjson
 import logging
 
 router = APIRouter()
@@ -17,16 +19,17 @@ async def websocket_endpoint(websocket: WebSocket, flow_id: str):
     
     try:
         while True:
-            data = await websocket.receive_text()
+            # Oversized frames are refused by the server (ws_max_size) before they get here
+            data = await asyncio.wait_for(websocket.receive_text(), timeout=READ_TIMEOUT)
             
             try:
-                message = json.loads(data)
+                message = orjson.loads(data)
                 response = await message_handler.handle_message(message, flow_id)
                 
                 if response:
                     await manager.send_personal_message(response, websocket)
                     
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 error_response = {
                     "type": "error",
                     "message": "Invalid JSON format"
@@ -42,8 +45,13 @@ async def websocket_endpoint(websocket: WebSocket, flow_id: str):
                 await manager.send_personal_message(error_response, websocket)
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, flow_id)
+        await manager.disconnect(websocket)
         logger.info(f"Client disconnected from flow {flow_id}")
+    except asyncio.TimeoutError:
+        # Reap idle sockets instead of pinning their file descriptors
+        await manager.disconnect(websocket)
+        await websocket.close()
+        logger.info(f"Closed idle connection to flow {flow_id}")
     except Exception as e:
         logger.error(f"WebSocket error: {str(e)}")
-        manager.disconnect(websocket, flow_id)
\ No newline at end of file
+        await manager.disconnect(websocket)
\ No newline at end of file
@@ -1,7 +1,8 @@
+import asyncio
 import os
-import importlib
+import importlib.util
 import inspect
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from pathlib import Path
 import logging
 
@@ -12,6 +13,9 @@ class PluginManager:
     def __init__(self):
         self.plugins: Dict[str, Any] = {}
         self.node_types: Dict[str, Any] = {}
+        # Node type descriptors, materialized once as classes are registered
+        self._type_infos: Dict[str, Dict[str, Any]] = {}
+        self._types_list: Tuple[Dict[str, Any], ...] = ()
 
     async def load_plugins(self):
         """Load all plugins from the plugins directory"""
@@ -22,19 +26,47 @@ class PluginManager:
             plugins_dir.mkdir(exist_ok=True)
             return
 
-        for plugin_file in plugins_dir.glob("*.py"):
-            if plugin_file.name.startswith("__"):
-                continue
-                
-            try:
-                await self._load_plugin(plugin_file)
-            except Exception as e:
-                logger.error(f"Failed to load plugin {plugin_file.name}: {str(e)}")
+        plugin_files = [
+            plugin_file for plugin_file in plugins_dir.glob("*.py")
+            if not plugin_file.name.startswith("__")
+        ]
+        
+        # Plugin files are independent, so import them on worker threads in parallel
+        results = await asyncio.gather(
+            *(self._load_plugin(plugin_file) for plugin_file in plugin_files),
+            return_exceptions=True
+        )
+        
+        for plugin_file, result in zip(plugin_files, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to load plugin {plugin_file.name}: {str(result)}")
 
     async def _load_plugin(self, plugin_path: Path):
         """Load a single plugin file"""
+        node_classes = await asyncio.to_thread(self._load_plugin_sync, plugin_path)
+        
+        # Register on the event loop thread so the registry is only mutated here
+        for node_class in node_classes:
+            node_type = node_class.node_type
+            self.node_types[node_type] = node_class
+            self._type_infos[node_type] = {
+                "type": node_type,
+                "title": getattr(node_class, "title", node_type),
+                "description": getattr(node_class, "description", ""),
+                "category": getattr(node_class, "category", "general"),
+                "inputs": getattr(node_class, "inputs", []),
+                "outputs": getattr(node_class, "outputs", [])
+            }
+            logger.info(f"Loaded node type: {node_type}")
+        
+        if node_classes:
+            self._types_list = tuple(self._type_infos.values())
+
+    def _load_plugin_sync(self, plugin_path: Path) -> List[Any]:
+        """Import a plugin file and return the node classes it defines"""
         module_name = f"plugins.{plugin_path.stem}"
         spec = importlib.util.spec_from_file_location(module_name, plugin_path)
+        node_classes = []
         
         if spec and spec.loader:
             module = importlib.util.module_from_spec(spec)
@@ -43,28 +75,21 @@ class PluginManager:
             # Look for node classes in the module
             for name, obj in inspect.getmembers(module):
                 if inspect.isclass(obj) and hasattr(obj, "node_type"):
-                    self.node_types[obj.node_type] = obj
-                    logger.info(f"Loaded node type: {obj.node_type}")
+                    node_classes.append(obj)
+        
+        return node_classes
 
     def get_node_type(self, node_type: str):
         """Get a node class by type"""
         return self.node_types.get(node_type)
 
-    def get_available_node_types(self) -> List[Dict[str, Any]]:
+    def get_available_node_types(self) -> Tuple[Dict[str, Any], ...]:
         """Get list of available node types"""
-        types = []
-        for node_type, node_class in self.node_types.items():
-            types.append({
-                "type": node_type,
-                "title": getattr(node_class, "title", node_type),
-                "description": getattr(node_class, "description", ""),
-                "category": getattr(node_class, "category", "general"),
-                "inputs": getattr(node_class, "inputs", []),
-                "outputs": getattr(node_class, "outputs", [])
-            })
-        return types
+        return self._types_list
 
     async def cleanup(self):
         """Cleanup resources"""
         self.plugins.clear()
-        self.node_types.clear()
\ No newline at end of file
+        self.node_types.clear()
+        self._type_infos.clear()
+        self._types_list = ()
\ No newline at end of file
@@ -1,9 +1,13 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from .api import flows, nodes, websocket
 from .core.plugin_manager import PluginManager
+from .services.flow_service import FlowService
+from .services.node_service import NodeService
 
 
 @asynccontextmanager
@@ -12,8 +16,16 @@ async def lifespan(app: FastAPI):
     plugin_manager = PluginManager()
     await plugin_manager.load_plugins()
     app.state.plugin_manager = plugin_manager
+    # Services hold in-memory state, so one instance is shared app-wide
+    app.state.flow_service = FlowService()
+    app.state.node_service = NodeService()
+    # Fan websocket broadcasts out across workers when Redis is configured
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        await websocket.manager.start_backplane(redis_url)
     yield
     # Shutdown
+    await websocket.manager.stop_backplane()
     await plugin_manager.cleanup()
 
 
@@ -21,7 +33,8 @@ app = FastAPI(
     title="MindFlow API",
     description="Backend API for MindFlow visual node editor",
     version="0.1.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -45,9 +58,4 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
-
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    return {"status": "healthy"}
\ No newline at end of file
@@ -1,10 +1,14 @@
 from typing import List, Optional
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, Field, TypeAdapter, field_serializer, field_validator
+from datetime import datetime, timedelta, timezone
+import time
 
 from .node import Node
 from .connection import Connection
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_DATETIME = TypeAdapter(datetime)
+
 
 class FlowBase(BaseModel):
     name: str = Field(..., description="Flow name")
@@ -26,10 +30,26 @@ class Flow(FlowBase):
     id: str = Field(..., description="Unique flow identifier")
     nodes: List[Node] = Field(default_factory=list, description="Flow nodes")
     connections: List[Connection] = Field(default_factory=list, description="Node connections")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Nanoseconds since the epoch; serialized as ISO-8601 and parsed back from it
+    created_at: int = Field(default_factory=time.time_ns)
+    updated_at: int = Field(default_factory=time.time_ns)
     version: int = Field(default=1, description="Flow version")
     is_readonly: bool = Field(default=False, description="Read-only flag")
 
+    @field_validator("created_at", "updated_at", mode="before")
+    @classmethod
+    def parse_timestamp(cls, value):
+        if isinstance(value, (str, datetime)):
+            timestamp = _DATETIME.validate_python(value)
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            return (timestamp - _EPOCH) // timedelta(microseconds=1) * 1000
+        return value
+
+    @field_serializer("created_at", "updated_at")
+    def serialize_timestamp(self, value: int) -> str:
+        # Integer arithmetic keeps full microsecond precision
+        return (_EPOCH + timedelta(microseconds=value // 1000)).isoformat()
+
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,7 +1,15 @@
+from dataclasses import dataclass
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel, Field
 
 
+@dataclass(slots=True)
+class Position:
+    # Slotted dataclass rather than BaseModel/dict: two floats, no per-node __dict__
+    x: float
+    y: float
+
+
 class NodeInput(BaseModel):
     name: str
     type: str
@@ -18,7 +26,7 @@ class NodeOutput(BaseModel):
 class NodeBase(BaseModel):
     type: str = Field(..., description="Node type identifier")
     title: str = Field(..., description="Node display title")
-    position: Dict[str, float] = Field(..., description="Node position {x, y}")
+    position: Position = Field(..., description="Node position {x, y}")
     properties: Dict[str, Any] = Field(default_factory=dict, description="Node properties")
 
 
@@ -28,7 +36,7 @@ class NodeCreate(NodeBase):
 
 class NodeUpdate(BaseModel):
     title: Optional[str] = None
-    position: Optional[Dict[str, float]] = None
+    position: Optional[Position] = None
     properties: Optional[Dict[str, Any]] = None
 
 
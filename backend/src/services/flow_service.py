@@ -1,6 +1,7 @@
 from typing import List, Optional
+import threading
+import time
 import uuid
-from datetime import datetime
 from ..models import Flow, FlowCreate, FlowUpdate
 
 
@@ -8,43 +9,95 @@ class FlowService:
     def __init__(self):
         # In-memory storage for development - replace with database
         self._flows: dict[str, Flow] = {}
+        # Sync handlers run on the threadpool, so mutations are serialized here
+        self._lock = threading.Lock()
+        # Serialized JSON per flow, dropped whenever the flow changes
+        self._flow_blobs: dict[str, bytes] = {}
+        self._list_blob: Optional[bytes] = None
+        # Bumped on every mutation so a list blob built from stale flows isn't stored
+        self._generation = 0
 
-    async def create_flow(self, flow_create: FlowCreate) -> Flow:
+    def create_flow(self, flow_create: FlowCreate) -> Flow:
         flow_id = str(uuid.uuid4())
-        flow = Flow(
+        now = time.time_ns()
+        # flow_create is already validated, so skip the dump/re-validate round trip
+        flow = Flow.model_construct(
             id=flow_id,
-            **flow_create.model_dump(),
+            name=flow_create.name,
+            description=flow_create.description,
+            metadata=flow_create.metadata,
             nodes=[],
             connections=[],
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            created_at=now,
+            updated_at=now,
+            version=1,
+            is_readonly=False
         )
-        self._flows[flow_id] = flow
+        with self._lock:
+            self._flows[flow_id] = flow
+            self._invalidate(flow_id)
         return flow
 
-    async def get_flow(self, flow_id: str) -> Optional[Flow]:
+    def get_flow(self, flow_id: str) -> Optional[Flow]:
         return self._flows.get(flow_id)
 
-    async def list_flows(self) -> List[Flow]:
+    def list_flows(self) -> List[Flow]:
         return list(self._flows.values())
 
-    async def update_flow(self, flow_id: str, flow_update: FlowUpdate) -> Optional[Flow]:
-        if flow_id not in self._flows:
-            return None
+    def get_flow_json(self, flow_id: str) -> Optional[bytes]:
+        with self._lock:
+            blob = self._flow_blobs.get(flow_id)
+            if blob is not None:
+                return blob
+            flow = self._flows.get(flow_id)
+            if flow is None:
+                return None
+            # update_flow mutates flows in place, so serialize while no update can interleave
+            blob = flow.model_dump_json().encode()
+            self._flow_blobs[flow_id] = blob
+            return blob
+
+    def list_flows_json(self) -> bytes:
+        with self._lock:
+            if self._list_blob is not None:
+                return self._list_blob
+            generation = self._generation
+            flow_ids = list(self._flows)
         
-        flow = self._flows[flow_id]
+        blobs = [blob for blob in map(self.get_flow_json, flow_ids) if blob is not None]
+        list_blob = b"[" + b",".join(blobs) + b"]"
+        with self._lock:
+            if self._generation == generation:
+                self._list_blob = list_blob
+        return list_blob
+
+    def _invalidate(self, flow_id: str):
+        # Callers hold self._lock
+        self._flow_blobs.pop(flow_id, None)
+        self._list_blob = None
+        self._generation += 1
+
+    def update_flow(self, flow_id: str, flow_update: FlowUpdate) -> Optional[Flow]:
         update_data = flow_update.model_dump(exclude_unset=True)
         
-        for field, value in update_data.items():
-            setattr(flow, field, value)
-        
-        flow.updated_at = datetime.utcnow()
-        flow.version += 1
+        with self._lock:
+            flow = self._flows.get(flow_id)
+            if flow is None:
+                return None
+            
+            for field, value in update_data.items():
+                setattr(flow, field, value)
+            
+            flow.updated_at = time.time_ns()
+            flow.version += 1
+            self._invalidate(flow_id)
         
         return flow
 
-    async def delete_flow(self, flow_id: str) -> bool:
-        if flow_id in self._flows:
-            del self._flows[flow_id]
-            return True
-        return False
\ No newline at end of file
+    def delete_flow(self, flow_id: str) -> bool:
+        with self._lock:
+            if flow_id in self._flows:
+                del self._flows[flow_id]
+                self._invalidate(flow_id)
+                return True
+            return False
\ No newline at end of file
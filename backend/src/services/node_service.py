@@ -1,63 +1,77 @@
 from typing import List, Optional
+import threading
 import uuid
 from ..models import Node, NodeCreate, NodeUpdate
 
 
+# Available node types from plugin system, built once at import
+_NODE_TYPES: List[dict] = [
+    {
+        "type": "input",
+        "title": "Input Node",
+        "description": "Basic input node",
+        "category": "inputs"
+    },
+    {
+        "type": "output", 
+        "title": "Output Node",
+        "description": "Basic output node",
+        "category": "outputs"
+    },
+    {
+        "type": "math_add",
+        "title": "Add",
+        "description": "Add two numbers",
+        "category": "math"
+    }
+]
+
+
 class NodeService:
     def __init__(self):
         # In-memory storage for development - replace with database
         self._nodes: dict[str, Node] = {}
+        # Sync handlers run on the threadpool, so mutations are serialized here
+        self._lock = threading.Lock()
 
-    async def create_node(self, node_create: NodeCreate, flow_id: str) -> Node:
+    def create_node(self, node_create: NodeCreate, flow_id: str) -> Node:
         node_id = str(uuid.uuid4())
-        node = Node(
+        # node_create is already validated, so skip the dump/re-validate round trip
+        node = Node.model_construct(
             id=node_id,
             flow_id=flow_id,
-            **node_create.model_dump()
+            type=node_create.type,
+            title=node_create.title,
+            position=node_create.position,
+            properties=node_create.properties,
+            inputs=[],
+            outputs=[]
         )
-        self._nodes[node_id] = node
+        with self._lock:
+            self._nodes[node_id] = node
         return node
 
-    async def get_node(self, node_id: str) -> Optional[Node]:
+    def get_node(self, node_id: str) -> Optional[Node]:
         return self._nodes.get(node_id)
 
-    async def update_node(self, node_id: str, node_update: NodeUpdate) -> Optional[Node]:
-        if node_id not in self._nodes:
-            return None
-        
-        node = self._nodes[node_id]
-        update_data = node_update.model_dump(exclude_unset=True)
-        
-        for field, value in update_data.items():
-            setattr(node, field, value)
+    def update_node(self, node_id: str, node_update: NodeUpdate) -> Optional[Node]:
+        with self._lock:
+            node = self._nodes.get(node_id)
+            if node is None:
+                return None
+            
+            # Copy validated values as-is so nested types (e.g. Position) survive
+            for field in node_update.model_fields_set:
+                setattr(node, field, getattr(node_update, field))
         
         return node
 
-    async def delete_node(self, node_id: str) -> bool:
-        if node_id in self._nodes:
-            del self._nodes[node_id]
-            return True
-        return False
-
-    async def get_available_node_types(self) -> List[dict]:
-        # Return available node types from plugin system
-        return [
-            {
-                "type": "input",
-                "title": "Input Node",
-                "description": "Basic input node",
-                "category": "inputs"
-            },
-            {
-                "type": "output", 
-                "title": "Output Node",
-                "description": "Basic output node",
-                "category": "outputs"
-            },
-            {
-                "type": "math_add",
-                "title": "Add",
-                "description": "Add two numbers",
-                "category": "math"
-            }
-        ]
\ No newline at end of file
+    def delete_node(self, node_id: str) -> bool:
+        with self._lock:
+            if node_id in self._nodes:
+                del self._nodes[node_id]
+                return True
+            return False
+
+    def get_available_node_types(self) -> List[dict]:
+        return _NODE_TYPES
@@ -1,53 +1,158 @@
-from typing import Dict, List
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
 from fastapi import WebSocket
-import json
+import orjson
+import redis.asyncio as redis
 import logging
 
 logger = logging.getLogger(__name__)
 
+CHANNEL_PREFIX = "flow:"
+# Backoff bounds, in seconds, for resubscribing after the backplane drops
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_MAX = 30.0
+
+
+@dataclass
+class FlowRoom:
+    """Sockets connected to one flow, guarded by a per-flow lock"""
+    sockets: Set[WebSocket] = field(default_factory=set)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
 
 class ConnectionManager:
     def __init__(self):
-        # Store active connections by flow_id
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Store active connections by flow_id, one independently locked room per flow
+        self.rooms: Dict[str, FlowRoom] = {}
+        # Reverse index so a socket's flow can be found without scanning
+        self._socket_flow: Dict[WebSocket, str] = {}
+        # Optional Redis pub/sub backplane shared by all workers
+        self._redis: Optional[redis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
 
     async def connect(self, websocket: WebSocket, flow_id: str):
         await websocket.accept()
         
-        if flow_id not in self.active_connections:
-            self.active_connections[flow_id] = []
+        while True:
+            room = self.rooms.setdefault(flow_id, FlowRoom())
+            async with room.lock:
+                # The room may have been emptied and dropped while we waited
+                if self.rooms.get(flow_id) is room:
+                    room.sockets.add(websocket)
+                    break
         
-        self.active_connections[flow_id].append(websocket)
+        self._socket_flow[websocket] = flow_id
         logger.info(f"Client connected to flow {flow_id}")
 
-    def disconnect(self, websocket: WebSocket, flow_id: str):
-        if flow_id in self.active_connections:
-            if websocket in self.active_connections[flow_id]:
-                self.active_connections[flow_id].remove(websocket)
+    async def disconnect(self, websocket: WebSocket, flow_id: Optional[str] = None):
+        # The socket's registered flow wins over the caller's flow_id
+        flow_id = self._socket_flow.pop(websocket, flow_id)
+        
+        room = self.rooms.get(flow_id)
+        if room is None:
+            return
+        
+        async with room.lock:
+            room.sockets.discard(websocket)
             
             # Clean up empty flow connections
-            if not self.active_connections[flow_id]:
-                del self.active_connections[flow_id]
+            if not room.sockets and self.rooms.get(flow_id) is room:
+                del self.rooms[flow_id]
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         try:
-            await websocket.send_text(json.dumps(message))
+            await websocket.send_text(orjson.dumps(message).decode())
         except Exception as e:
             logger.error(f"Failed to send message: {str(e)}")
 
     async def broadcast_to_flow(self, message: dict, flow_id: str):
-        if flow_id in self.active_connections:
-            disconnected = []
-            
-            for connection in self.active_connections[flow_id]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except Exception:
-                    disconnected.append(connection)
+        # Serialize once for the whole fan-out
+        payload = orjson.dumps(message)
+        
+        if self._redis:
+            # Every worker, including this one, delivers it from the subscription
+            try:
+                await self._redis.publish(f"{CHANNEL_PREFIX}{flow_id}", payload)
+                return
+            except (redis.RedisError, OSError) as e:
+                logger.error(f"Failed to publish broadcast for flow {flow_id}, delivering locally: {str(e)}")
+        
+        await self._send_to_local(payload.decode(), flow_id)
+
+    async def _send_to_local(self, payload: str, flow_id: str):
+        room = self.rooms.get(flow_id)
+        if room:
+            # Send to a snapshot concurrently so one slow client doesn't hold up the rest
+            connections = list(room.sockets)
+            results = await asyncio.gather(
+                *(connection.send_text(payload) for connection in connections),
+                return_exceptions=True
+            )
+            disconnected = {
+                connection for connection, result in zip(connections, results)
+                if isinstance(result, Exception)
+            }
             
             # Remove disconnected connections
             for connection in disconnected:
-                self.active_connections[flow_id].remove(connection)
+                await self.disconnect(connection, flow_id)
 
     def get_flow_connection_count(self, flow_id: str) -> int:
-        return len(self.active_connections.get(flow_id, []))
\ No newline at end of file
+        room = self.rooms.get(flow_id)
+        return len(room.sockets) if room else 0
+
+    async def start_backplane(self, redis_url: str):
+        """Relay broadcasts through Redis so every worker reaches its own sockets"""
+        client = redis.from_url(redis_url)
+        try:
+            await client.ping()
+        except (redis.RedisError, OSError) as e:
+            # The backplane is optional; a single worker works fine without it
+            logger.warning(f"Broadcast backplane unavailable at {redis_url}, delivering locally only: {str(e)}")
+            await client.aclose()
+            return
+        
+        self._redis = client
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"Broadcast backplane connected to {redis_url}")
+
+    async def stop_backplane(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Broadcast backplane listener failed: {str(e)}")
+            self._listener = None
+        
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _listen(self):
+        delay = RECONNECT_DELAY
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                delay = RECONNECT_DELAY
+                
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    
+                    flow_id = message["channel"].decode()[len(CHANNEL_PREFIX):]
+                    try:
+                        await self._send_to_local(message["data"].decode(), flow_id)
+                    except Exception as e:
+                        logger.error(f"Failed to relay broadcast for flow {flow_id}: {str(e)}")
+            except (redis.RedisError, OSError) as e:
+                logger.error(f"Broadcast backplane connection lost, resubscribing in {delay:g}s: {str(e)}")
+            finally:
+                await pubsub.aclose()
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
\ No newline at end of file
@@ -0,0 +1,7 @@
+# Limits shared by the websocket endpoint and the Uvicorn entrypoint
+
+# Largest inbound frame accepted, in bytes
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+# Seconds a connection may stay silent before it is closed
+READ_TIMEOUT = 120.0
@@ -1,33 +1,30 @@
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Awaitable, Callable, Mapping, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class MessageHandler:
-    def __init__(self):
-        self.handlers: Dict[str, callable] = {
-            "node_update": self._handle_node_update,
-            "node_create": self._handle_node_create,
-            "node_delete": self._handle_node_delete,
-            "connection_create": self._handle_connection_create,
-            "connection_delete": self._handle_connection_delete,
-            "flow_execute": self._handle_flow_execute,
-            "ping": self._handle_ping
-        }
-
     async def handle_message(self, message: Dict[str, Any], flow_id: str) -> Optional[Dict[str, Any]]:
-        message_type = message.get("type")
+        try:
+            message_type = message["type"]
+        except KeyError:
+            message_type = None
+        
+        # Keepalives are the most frequent message, answer them inline
+        if message_type == "ping":
+            return {"type": "pong", "timestamp": message.get("timestamp")}
         
         if not message_type:
             return {"type": "error", "message": "Missing message type"}
         
-        handler = self.handlers.get(message_type)
+        handler = _HANDLERS.get(message_type)
         if not handler:
             return {"type": "error", "message": f"Unknown message type: {message_type}"}
         
         try:
-            return await handler(message, flow_id)
+            return await handler(self, message, flow_id)
         except Exception as e:
             logger.error(f"Error handling {message_type}: {str(e)}")
             return {"type": "error", "message": f"Error processing {message_type}"}
@@ -98,5 +95,14 @@ class MessageHandler:
             "flow_id": flow_id
         }
 
-    async def _handle_ping(self, message: Dict[str, Any], flow_id: str) -> Dict[str, Any]:
-        return {"type": "pong", "timestamp": message.get("timestamp")}
\ No newline at end of file
+
+# Dispatch table of coroutine handlers built once at import time, shared by all
+# handler instances; keep every entry async so dispatch can always await it
+_HANDLERS: Mapping[str, Callable[..., Awaitable[Dict[str, Any]]]] = MappingProxyType({
+    "node_update": MessageHandler._handle_node_update,
+    "node_create": MessageHandler._handle_node_create,
+    "node_delete": MessageHandler._handle_node_delete,
+    "connection_create": MessageHandler._handle_connection_create,
+    "connection_delete": MessageHandler._handle_connection_delete,
+    "flow_execute": MessageHandler._handle_flow_execute
+})
\ No newline at end of file
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+
+from src.models import Flow
+
+
+def test_flow_round_trips_through_json():
+    flow = Flow(id="flow-1", name="Flow", created_at=1_700_000_000_123_456_789)
+
+    restored = Flow.model_validate_json(flow.model_dump_json())
+
+    assert restored.model_dump_json() == flow.model_dump_json()
+    assert restored.created_at == 1_700_000_000_123_456_000
+
+
+def test_flow_round_trips_through_python_dump():
+    flow = Flow(id="flow-1", name="Flow")
+
+    dumped = flow.model_dump()
+
+    assert dumped["created_at"] == flow.model_dump(mode="json")["created_at"]
+    assert Flow.model_validate(dumped) == Flow.model_validate_json(flow.model_dump_json())
+
+
+def test_flow_accepts_iso_strings_and_datetimes():
+    expected = 1_700_000_000_000_000_000
+    moment = datetime.fromtimestamp(1_700_000_000, tz=timezone.utc)
+
+    for value in (moment, moment.replace(tzinfo=None), "2023-11-14T22:13:20Z",
+                  "2023-11-14T22:13:20+00:00", expected):
+        assert Flow(id="flow-1", name="Flow", created_at=value).created_at == expected
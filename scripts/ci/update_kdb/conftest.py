@@ -0,0 +1,13 @@
+"""Let the test suite run in-tree, where the script keeps its repository file name
+
+The tests import and patch the module as `docsync`, the name it is installed
+under in CI, so alias doc_sync_system to that name when no docsync module exists.
+"""
+
+import importlib.util
+import sys
+
+if importlib.util.find_spec("docsync") is None:
+    import doc_sync_system
+
+    sys.modules["docsync"] = doc_sync_system
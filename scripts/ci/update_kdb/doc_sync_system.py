@@ -11,19 +11,104 @@ License: MIT
 
 import os
 import sys
+import re
+import copy
 import json
 import logging
 import argparse
+import asyncio
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Set, Optional, Tuple
+from typing import Iterator, List, Dict, Set, Optional, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urljoin
 import hashlib
+import orjson
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+
+def _content_digest(data: bytes) -> str:
+    """Digest of raw file bytes, BLAKE3 when available
+    
+    The algorithm name is part of the value, so hosts with and without blake3
+    never mistake each other's cached hashes for matches.
+    """
+    if blake3 is not None:
+        return "blake3:" + blake3.blake3(data).hexdigest()
+    return "blake2b:" + hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _doc_id(file_path: str) -> str:
+    """Document ID for a repository path; the same paths recur within and across syncs"""
+    return hashlib.blake2b(file_path.encode(), digest_size=16).hexdigest()
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate an exclude glob into a regex for `re.search` over repository paths
+    
+    `*` and `?` stay within one path segment and `**` spans any number of them.
+    Patterns match at any directory boundary unless they start with `/`, and
+    must reach the end of the path; a trailing `/` matches everything below.
+    """
+    anchor = '^' if pattern.startswith('/') else '(?:^|/)'
+    pattern = pattern.strip('/') + ('/**' if pattern.endswith('/') else '')
+    
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+            end = pattern.index(']', i + 2)
+            body = pattern[i + 1:end].replace('\\', '\\\\')
+            parts.append('[^' + body[1:] + ']' if body[:1] == '!' else '[' + body + ']')
+            i = end + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    
+    return anchor + ''.join(parts) + '$'
+
+
+@lru_cache(maxsize=8)
+def _cached_yaml(path: str, mtime_ns: int, size: int) -> dict:
+    """Parse a YAML file once per (modification time, size)"""
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=SafeLoader)
+
+
+# Slotted dataclasses need Python 3.10; older interpreters get regular ones
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 class ChangeType(Enum):
     """Types of file changes detected"""
@@ -33,7 +118,7 @@ class ChangeType(Enum):
     RENAMED = "renamed"
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class FileChange:
     """Represents a change to a documentation file"""
     path: str
@@ -41,9 +126,10 @@ class FileChange:
     old_path: Optional[str] = None  # For renamed files
     content: Optional[str] = None
     content_hash: Optional[str] = None
+    unchanged: bool = False  # Content matches what was last synced
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Config:
     """Configuration for the documentation sync system"""
     # Git settings
@@ -63,12 +149,16 @@ class Config:
     log_level: str
     log_file: Optional[str]
     
+    # Maximum number of API requests in flight at once
+    max_concurrency: int = 16
+    
     @classmethod
     def from_file(cls, config_path: str) -> 'Config':
         """Load configuration from YAML file"""
-        with open(config_path, 'r') as f:
-            data = yaml.safe_load(f)
-        return cls(**data)
+        st = os.stat(config_path)
+        data = _cached_yaml(config_path, st.st_mtime_ns, st.st_size)
+        # Copy so configs loaded from the same file don't share their lists
+        return cls(**copy.deepcopy(data))
     
     @classmethod
     def default(cls) -> 'Config':
@@ -82,217 +172,392 @@ class Config:
             batch_size=10,
             dry_run=False,
             log_level="INFO",
-            log_file=None
+            log_file=None,
+            max_concurrency=16
         )
 
 
+class HashCache:
+    """Content hashes of the documents and the HEAD as of the last successful sync"""
+    
+    FILENAME = "docsync-cache.json"
+    
+    def __init__(self, hashes: Optional[Dict[str, str]] = None, last_synced_head: Optional[str] = None):
+        self.hashes: Dict[str, str] = hashes or {}
+        self.last_synced_head = last_synced_head
+        self._dirty = False
+    
+    @classmethod
+    def default_path(cls, repo_path: Path) -> Path:
+        """Cache location inside the repository's git directory, out of the worktree"""
+        try:
+            git_dir = subprocess.run(
+                ["git", "rev-parse", "--absolute-git-dir"],
+                cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True
+            ).stdout.strip()
+        except (subprocess.CalledProcessError, OSError):
+            # Not a git checkout; syncing will fail anyway, so keep the old location
+            return repo_path / cls.FILENAME
+        return Path(git_dir) / cls.FILENAME
+    
+    @classmethod
+    def load(cls, path: Path) -> 'HashCache':
+        """Load a cache file, starting empty if it is missing or unreadable"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            return cls(data["hashes"], data.get("last_synced_head"))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.getLogger(__name__).debug("Starting with an empty hash cache: %s", e)
+            return cls()
+    
+    def save(self, path: Path):
+        """Write the cache back if anything was recorded since loading"""
+        if not self._dirty:
+            return
+        
+        data = {"last_synced_head": self.last_synced_head, "hashes": self.hashes}
+        with open(path, 'w') as f:
+            json.dump(data, f, sort_keys=True)
+        self._dirty = False
+    
+    def get(self, file_path: str) -> Optional[str]:
+        return self.hashes.get(file_path)
+    
+    def record(self, changes: List[FileChange]):
+        """Remember the synced state of each change"""
+        for change in changes:
+            if change.change_type == ChangeType.RENAMED and change.old_path:
+                self._dirty |= self.hashes.pop(change.old_path, None) is not None
+            
+            if change.change_type == ChangeType.DELETED:
+                self._dirty |= self.hashes.pop(change.path, None) is not None
+            elif change.content_hash and self.hashes.get(change.path) != change.content_hash:
+                self.hashes[change.path] = change.content_hash
+                self._dirty = True
+    
+    def record_head(self, head: str):
+        """Remember the commit the knowledge DB now reflects"""
+        if head != self.last_synced_head:
+            self.last_synced_head = head
+            self._dirty = True
+
+
+class GitBatchReader:
+    """Reads objects through a single long-lived `git cat-file --batch` process"""
+    
+    def __init__(self, repo_path: Path):
+        self.repo_path = repo_path
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+    
+    def read_blob(self, rev: str, path: str) -> Optional[bytes]:
+        """Return the contents of `path` at `rev` (empty rev reads the index), or None if absent"""
+        obj = self._request(f"{rev}:{path}")
+        return obj[2] if obj and obj[1] == b"blob" else None
+    
+    def resolve_commit(self, rev: str) -> Optional[str]:
+        """Return the commit hash `rev` points to, or None if it doesn't resolve"""
+        obj = self._request(f"{rev}^{{commit}}")
+        return obj[0].decode() if obj else None
+    
+    def _request(self, name: str) -> Optional[Tuple[bytes, bytes, bytes]]:
+        """Look up one object by name, returning (sha, type, contents) or None if missing"""
+        # Requests and responses share one pipe, so callers take turns
+        with self._lock:
+            if self._process is None:
+                self._process = subprocess.Popen(
+                    ["git", "cat-file", "--batch"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    cwd=self.repo_path
+                )
+            
+            try:
+                self._process.stdin.write(f"{name}\n".encode())
+                self._process.stdin.flush()
+            except BrokenPipeError:
+                # git exited, e.g. because repo_path is not a repository
+                return None
+            
+            # Header is "<sha> <type> <size>", or "<object> missing" when not found
+            header = self._process.stdout.readline().split()
+            if len(header) != 3:
+                return None
+            
+            data = self._process.stdout.read(int(header[2]))
+            self._process.stdout.read(1)  # trailing newline
+            
+            return header[0], header[1], data
+    
+    def close(self):
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+
+
 class GitAnalyzer:
     """Analyzes Git repository changes for documentation files"""
     
-    def __init__(self, config: Config, repo_path: str = "."):
+    # First letter of a `git diff --name-status` status; others (copies, type changes) are ignored
+    _STATUS_MAP = {
+        'A': ChangeType.ADDED,
+        'M': ChangeType.MODIFIED,
+        'D': ChangeType.DELETED,
+        'R': ChangeType.RENAMED,
+    }
+    
+    def __init__(self, config: Config, repo_path: str = ".", hash_cache: Optional[HashCache] = None):
         self.config = config
         self.repo_path = Path(repo_path).resolve()
+        self.hash_cache = hash_cache
         self.logger = logging.getLogger(__name__)
+        self._blob_reader = GitBatchReader(self.repo_path)
+        
+        # Compile path filters once instead of re-parsing globs per changed file
+        self._exclude_re = re.compile(
+            '|'.join(f'(?:{_glob_to_regex(p)})' for p in config.exclude_patterns) or '(?!)'
+        )
+        self._extensions = tuple(frozenset(config.file_extensions))
+        self._watch_prefixes = tuple(w.rstrip('/') + '/' for w in config.watch_directories)
     
-    def get_changes_since_commit(self, commit_hash: str) -> List[FileChange]:
-        """Get changes since a specific commit"""
-        try:
-            # Get the diff with file status
-            cmd = ["git", "diff", "--name-status", commit_hash, "HEAD"]
-            result = subprocess.run(
-                cmd, 
-                cwd=self.repo_path, 
-                capture_output=True, 
-                text=True, 
-                check=True
-            )
-            
-            changes = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                parts = line.split('\t')
-                if len(parts) < 2:
-                    continue
-                
-                status = parts[0]
-                file_path = parts[1]
-                
-                # Check if file matches our criteria
-                if not self._should_process_file(file_path):
-                    continue
-                
-                change = self._parse_git_status(status, file_path, parts)
-                if change:
-                    changes.append(change)
-            
-            return changes
-            
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Git command failed: {e}")
-            return []
+    def __enter__(self) -> 'GitAnalyzer':
+        return self
     
-    def get_changes_between_commits(self, from_commit: str, to_commit: str) -> List[FileChange]:
-        """Get changes between two commits"""
-        try:
-            cmd = ["git", "diff", "--name-status", from_commit, to_commit]
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def resolve_commit(self, rev: str) -> Optional[str]:
+        """Resolve a revision to its commit hash, or None if it doesn't resolve"""
+        return self._blob_reader.resolve_commit(rev)
+    
+    def close(self):
+        """Stop the background git process"""
+        self._blob_reader.close()
+    
+    def commit_windows(self, commit_hash: str, initial: int = 64,
+                       max_batch: int = 1000) -> Iterator[Tuple[str, str]]:
+        """Split commit..HEAD into (start, end) ranges of first-parent commits
+        
+        Window sizes start at `initial` commits and double up to `max_batch`;
+        the net diffs of consecutive windows compose to the diff of the whole range,
+        so old base commits can be synced without holding every change at once.
+        
+        A base that is not an ancestor of HEAD (a rewritten or diverged branch)
+        has no first-parent path to walk, so it gets a single (commit, HEAD) window.
+        """
+        head = self.resolve_commit("HEAD")
+        if head is None or self.resolve_commit(commit_hash) == head:
+            return
+        
+        ancestor = subprocess.run(
+            ["git", "merge-base", "--is-ancestor", commit_hash, head],
+            cwd=self.repo_path,
+            capture_output=True
+        )
+        if ancestor.returncode not in (0, 1):
+            raise subprocess.CalledProcessError(
+                ancestor.returncode, ancestor.args, ancestor.stdout, ancestor.stderr
+            )
+        
+        commits = []
+        if ancestor.returncode == 0:
             result = subprocess.run(
-                cmd, 
-                cwd=self.repo_path, 
-                capture_output=True, 
-                text=True, 
+                ["git", "rev-list", "--first-parent", "--reverse", f"{commit_hash}..{head}"],
+                cwd=self.repo_path,
+                capture_output=True,
+                text=True,
                 check=True
             )
+            commits = result.stdout.split()
+        
+        if not commits:
+            yield commit_hash, head
+            return
+        
+        start = commit_hash
+        size = initial
+        position = 0
+        
+        while position < len(commits):
+            end = commits[min(position + size, len(commits)) - 1]
+            yield start, end
             
-            changes = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                parts = line.split('\t')
-                if len(parts) < 2:
-                    continue
-                
-                status = parts[0]
-                file_path = parts[1]
-                
-                if not self._should_process_file(file_path):
-                    continue
-                
-                change = self._parse_git_status(status, file_path, parts)
-                if change:
-                    changes.append(change)
+            start = end
+            position += size
+            size = min(size * 2, max_batch)
+    
+    def iter_changes(self, diff_args: List[str]) -> Iterator[FileChange]:
+        """Yield FileChange objects without content for matching paths as the diff is produced
+        
+        Pair with materialize_content to read each change's content. Git failures
+        raise CalledProcessError once the diff has been consumed.
+        """
+        for parts in self._iter_diff(diff_args):
+            status = parts[0]
+            file_path = parts[1]
             
-            return changes
+            # Check if file matches our criteria
+            if not self._should_process_file(file_path):
+                continue
             
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Git command failed: {e}")
-            return []
+            parsed = self._parse_status_line(status, parts)
+            if parsed:
+                change_type, path, old_path = parsed
+                yield FileChange(path=path, change_type=change_type, old_path=old_path)
     
-    def get_staged_changes(self) -> List[FileChange]:
-        """Get currently staged changes"""
+    def _iter_diff(self, diff_args: List[str]) -> Iterator[List[str]]:
+        """Stream `git diff -z --name-status`, yielding [status, path] or [status, old, new]"""
+        # -M keeps renames as one record even where diff.renames is turned off
+        cmd = ["git", "diff", "-z", "--name-status", "-M", *diff_args]
+        process = subprocess.Popen(cmd, cwd=self.repo_path, stdout=subprocess.PIPE)
+        
         try:
-            cmd = ["git", "diff", "--cached", "--name-status"]
-            result = subprocess.run(
-                cmd, 
-                cwd=self.repo_path, 
-                capture_output=True, 
-                text=True, 
-                check=True
-            )
+            record: List[str] = []
+            expected = 0
+            remainder = b""
             
-            changes = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                parts = line.split('\t')
-                if len(parts) < 2:
-                    continue
-                
-                status = parts[0]
-                file_path = parts[1]
+            # Records are NUL-separated fields: status, then one path (two for renames/copies)
+            for chunk in iter(lambda: process.stdout.read(65536), b""):
+                fields = (remainder + chunk).split(b"\0")
+                remainder = fields.pop()
                 
-                if not self._should_process_file(file_path):
-                    continue
-                
-                change = self._parse_git_status(status, file_path, parts)
-                if change:
-                    changes.append(change)
-            
-            return changes
-            
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Git command failed: {e}")
-            return []
+                for field in fields:
+                    if not record:
+                        record.append(field.decode())
+                        expected = 3 if field[:1] in (b"R", b"C") else 2
+                        continue
+                    
+                    record.append(os.fsdecode(field))
+                    if len(record) == expected:
+                        yield record
+                        record = []
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+        
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd)
     
     def _should_process_file(self, file_path: str) -> bool:
         """Check if file should be processed based on configuration"""
-        path = Path(file_path)
-        
-        # Check if file is in watched directories
-        in_watched_dir = any(
-            str(path).startswith(watch_dir.rstrip('/'))
-            for watch_dir in self.config.watch_directories
+        return (
+            file_path.startswith(self._watch_prefixes)
+            and file_path.endswith(self._extensions)
+            and not self._exclude_re.search(file_path)
         )
+    
+    def _parse_status_line(self, status: str, parts: List[str]) -> Optional[Tuple[ChangeType, str, Optional[str]]]:
+        """Map a diff record to (change type, path, old path)"""
+        change_type = self._STATUS_MAP.get(status[:1])
+        if change_type is None:
+            return None
         
-        if not in_watched_dir:
-            return False
+        if change_type == ChangeType.RENAMED and len(parts) >= 3:
+            return change_type, parts[2], parts[1]
         
-        # Check file extension
-        if path.suffix not in self.config.file_extensions:
-            return False
+        return change_type, parts[1], None
+    
+    def materialize_content(self, change: FileChange, rev: str) -> FileChange:
+        """Fill in content and hash for a change
         
-        # Check exclude patterns
-        for pattern in self.config.exclude_patterns:
-            if path.match(pattern):
-                return False
+        Content is read from `rev` (the index when empty) rather than the working tree.
+        """
+        if change.change_type == ChangeType.DELETED:
+            return change
         
-        return True
-    
-    def _parse_git_status(self, status: str, file_path: str, parts: List[str]) -> Optional[FileChange]:
-        """Parse git status and create FileChange object"""
-        change_type = None
-        old_path = None
-        
-        if status.startswith('A'):
-            change_type = ChangeType.ADDED
-        elif status.startswith('M'):
-            change_type = ChangeType.MODIFIED
-        elif status.startswith('D'):
-            change_type = ChangeType.DELETED
-        elif status.startswith('R'):
-            change_type = ChangeType.RENAMED
-            if len(parts) >= 3:
-                old_path = parts[1]
-                file_path = parts[2]
-        
-        if not change_type:
-            return None
+        try:
+            raw = self._blob_reader.read_blob(rev, change.path)
+        except Exception as e:
+            self.logger.warning("Could not read file %s: %s", change.path, e)
+            return change
         
-        # Get file content if file exists and wasn't deleted
-        content = None
-        content_hash = None
+        if raw is None:
+            return change
         
-        if change_type != ChangeType.DELETED:
-            full_path = self.repo_path / file_path
-            if full_path.exists():
-                try:
-                    content = full_path.read_text(encoding='utf-8')
-                    content_hash = hashlib.md5(content.encode()).hexdigest()
-                except Exception as e:
-                    self.logger.warning(f"Could not read file {file_path}: {e}")
-        
-        return FileChange(
-            path=file_path,
-            change_type=change_type,
-            old_path=old_path,
-            content=content,
-            content_hash=content_hash
+        change.content_hash = _content_digest(raw)
+        
+        # Re-synced ranges (CI retries, duplicate webhooks) re-report content we already sent
+        change.unchanged = (
+            self.hash_cache is not None
+            and change.change_type in (ChangeType.ADDED, ChangeType.MODIFIED)
+            and self.hash_cache.get(change.path) == change.content_hash
         )
+        
+        # Skipped changes are never sent, so don't hold a decoded copy of them
+        if not change.unchanged:
+            change.content = raw.decode('utf-8', errors='replace')
+        
+        return change
 
 
 class LightRAGClient:
     """Client for interacting with LightRAG API"""
     
+    JSON_HEADERS = {"Content-Type": "application/json"}
+    # Seconds a successful health check is trusted before probing again
+    HEALTH_TTL = 5.0
+    
     def __init__(self, config: Config):
         self.config = config
         self.base_url = config.api_base_url.rstrip('/')
         self.timeout = config.api_timeout
         self.logger = logging.getLogger(__name__)
+        
+        # One pooled session so every call reuses keep-alive connections
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,  # a single API host
+            pool_maxsize=config.max_concurrency,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
+        self._healthy_until = 0.0
+        self._session.hooks["response"].append(self._track_health)
     
-    def health_check(self) -> bool:
-        """Check if the LightRAG API is accessible"""
+    def close(self):
+        """Release pooled connections"""
+        self._session.close()
+    
+    def _post_json(self, url: str, payload: Dict) -> requests.Response:
+        """POST a payload encoded with orjson rather than the stdlib json module"""
+        return self._session.post(url, data=orjson.dumps(payload), headers=self.JSON_HEADERS, timeout=self.timeout)
+    
+    def _put_json(self, url: str, payload: Dict) -> requests.Response:
+        """PUT a payload encoded with orjson rather than the stdlib json module"""
+        return self._session.put(url, data=orjson.dumps(payload), headers=self.JSON_HEADERS, timeout=self.timeout)
+    
+    def _track_health(self, response: requests.Response, *args, **kwargs):
+        """Session response hook: a failed request means the next health check must probe again"""
+        if response.status_code >= 400:
+            self._mark_unhealthy()
+    
+    def _mark_unhealthy(self):
+        """Drop the cached health check; request exceptions call this since they never reach the hook"""
+        self._healthy_until = 0.0
+    
+    def health_check(self, force: bool = False) -> bool:
+        """Check if the LightRAG API is accessible, reusing a recent success unless `force`d"""
+        now = time.monotonic()
+        if not force and now < self._healthy_until:
+            return True
+        
         try:
-            response = requests.get(
+            response = self._session.get(
                 f"{self.base_url}/health",
                 timeout=self.timeout
             )
-            return response.status_code == 200
+            healthy = response.status_code == 200
         except Exception as e:
-            self.logger.error(f"Health check failed: {e}")
-            return False
+            self.logger.error("Health check failed: %s", e)
+            healthy = False
+        
+        self._healthy_until = now + self.HEALTH_TTL if healthy else 0.0
+        return healthy
     
     def insert_document(self, content: str, metadata: Optional[Dict] = None) -> bool:
         """Insert a new document into the knowledge base"""
@@ -301,23 +566,50 @@ class LightRAGClient:
             if metadata:
                 payload["metadata"] = metadata
             
-            response = requests.post(
-                f"{self.base_url}/insert",
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._post_json(f"{self.base_url}/insert", payload)
             
             if response.status_code == 200:
-                self.logger.info(f"Document inserted successfully")
+                self.logger.info("Document inserted successfully")
                 return True
             else:
-                self.logger.error(f"Insert failed: {response.status_code} - {response.text}")
+                self.logger.error("Insert failed: %d - %s", response.status_code, response.text)
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Insert request failed: {e}")
+            self.logger.error("Insert request failed: %s", e)
+            self._mark_unhealthy()
             return False
     
+    def insert_documents(self, contents: List[str], metadatas: List[Dict]) -> Optional[List[bool]]:
+        """Insert several documents with a single request
+        
+        Returns per-document success, or None if the request failed as a whole.
+        """
+        try:
+            payload = {"inputs": contents, "metadatas": metadatas}
+            
+            response = self._post_json(f"{self.base_url}/insert", payload)
+            
+            if response.status_code == 200:
+                # Servers may report per-document results; otherwise the whole batch succeeded
+                try:
+                    results = orjson.loads(response.content).get("results")
+                except (orjson.JSONDecodeError, AttributeError):
+                    results = None
+                if isinstance(results, list) and len(results) == len(contents):
+                    return [bool(result) for result in results]
+                
+                self.logger.info("Inserted %d documents successfully", len(contents))
+                return [True] * len(contents)
+            else:
+                self.logger.error("Batch insert failed: %d - %s", response.status_code, response.text)
+                return None
+                
+        except Exception as e:
+            self.logger.error("Batch insert request failed: %s", e)
+            self._mark_unhealthy()
+            return None
+    
     def update_document(self, doc_id: str, content: str, metadata: Optional[Dict] = None) -> bool:
         """Update an existing document"""
         try:
@@ -325,60 +617,55 @@ class LightRAGClient:
             if metadata:
                 payload["metadata"] = metadata
             
-            response = requests.put(
-                f"{self.base_url}/update/{doc_id}",
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._put_json(f"{self.base_url}/update/{doc_id}", payload)
             
             if response.status_code == 200:
-                self.logger.info(f"Document {doc_id} updated successfully")
+                self.logger.info("Document %s updated successfully", doc_id)
                 return True
             else:
-                self.logger.error(f"Update failed: {response.status_code} - {response.text}")
+                self.logger.error("Update failed: %d - %s", response.status_code, response.text)
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Update request failed: {e}")
+            self.logger.error("Update request failed: %s", e)
+            self._mark_unhealthy()
             return False
     
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document from the knowledge base"""
         try:
-            response = requests.delete(
+            response = self._session.delete(
                 f"{self.base_url}/delete/{doc_id}",
                 timeout=self.timeout
             )
             
             if response.status_code == 200:
-                self.logger.info(f"Document {doc_id} deleted successfully")
+                self.logger.info("Document %s deleted successfully", doc_id)
                 return True
             else:
-                self.logger.error(f"Delete failed: {response.status_code} - {response.text}")
+                self.logger.error("Delete failed: %d - %s", response.status_code, response.text)
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Delete request failed: {e}")
+            self.logger.error("Delete request failed: %s", e)
+            self._mark_unhealthy()
             return False
     
     def search_documents(self, query: str, limit: int = 10) -> List[Dict]:
         """Search for documents in the knowledge base"""
         try:
             payload = {"query": query, "limit": limit}
-            response = requests.post(
-                f"{self.base_url}/search",
-                json=payload,
-                timeout=self.timeout
-            )
+            response = self._post_json(f"{self.base_url}/search", payload)
             
             if response.status_code == 200:
-                return response.json().get("results", [])
+                return orjson.loads(response.content).get("results", [])
             else:
-                self.logger.error(f"Search failed: {response.status_code} - {response.text}")
+                self.logger.error("Search failed: %d - %s", response.status_code, response.text)
                 return []
                 
         except Exception as e:
-            self.logger.error(f"Search request failed: {e}")
+            self.logger.error("Search request failed: %s", e)
+            self._mark_unhealthy()
             return []
 
 
@@ -389,53 +676,114 @@ class DocumentProcessor:
         self.config = config
         self.client = lightrag_client
         self.logger = logging.getLogger(__name__)
+        self._handlers = {
+            ChangeType.ADDED: self._handle_added_file,
+            ChangeType.MODIFIED: self._handle_modified_file,
+            ChangeType.DELETED: self._handle_deleted_file,
+            ChangeType.RENAMED: self._handle_renamed_file,
+        }
     
     def process_changes(self, changes: List[FileChange]) -> Dict[str, int]:
         """Process a list of file changes"""
+        # The client is blocking, so calls run on a pool sized to the concurrency limit
+        with ThreadPoolExecutor(max_workers=self.config.max_concurrency) as executor:
+            return asyncio.run(self.process_changes_async(changes, executor))
+    
+    async def process_changes_async(self, changes: List[FileChange], executor: ThreadPoolExecutor) -> Dict[str, int]:
+        """Process a list of file changes, running API calls on `executor`"""
         results = {
             "processed": 0,
             "failed": 0,
             "skipped": 0
         }
         
-        for change in changes:
-            try:
-                if self.config.dry_run:
-                    self.logger.info(f"DRY RUN: Would process {change.change_type.value} for {change.path}")
-                    results["processed"] += 1
-                    continue
-                
-                success = self._process_single_change(change)
-                if success:
-                    results["processed"] += 1
-                else:
-                    results["failed"] += 1
-                    
-            except Exception as e:
-                self.logger.error(f"Error processing change for {change.path}: {e}")
+        if self.config.dry_run:
+            for change in changes:
+                self.logger.info("DRY RUN: Would process %s for %s", change.change_type.value, change.path)
+                results["processed"] += 1
+            return results
+        
+        # Content identical to the last sync needs no API call
+        pending = [change for change in changes if not change.unchanged]
+        results["skipped"] = len(changes) - len(pending)
+        changes = pending
+        
+        # Changes are independent, so issue their API calls concurrently
+        outcomes = await self._process_changes_concurrently(changes, executor)
+        
+        for change, outcome in outcomes:
+            if isinstance(outcome, Exception):
+                self.logger.error("Error processing change for %s: %s", change.path, outcome)
+                results["failed"] += 1
+            elif outcome:
+                results["processed"] += 1
+            else:
                 results["failed"] += 1
         
         return results
     
+    async def _process_changes_concurrently(self, changes: List[FileChange],
+                                            executor: ThreadPoolExecutor) -> List[Tuple[FileChange, object]]:
+        """Run change handlers with at most one request in flight per executor worker"""
+        loop = asyncio.get_running_loop()
+        
+        # New files go to the API batch_size at a time; everything else is per document
+        added = [c for c in changes if c.change_type == ChangeType.ADDED and c.content]
+        batched = set(map(id, added))
+        singles = [c for c in changes if id(c) not in batched]
+        batch_size = max(1, self.config.batch_size)
+        batches = [added[i:i + batch_size] for i in range(0, len(added), batch_size)]
+        
+        single_outcomes, batch_outcomes = await asyncio.gather(
+            asyncio.gather(
+                *(loop.run_in_executor(executor, self._process_single_change, c) for c in singles),
+                return_exceptions=True
+            ),
+            asyncio.gather(
+                *(loop.run_in_executor(executor, self._insert_batch, b) for b in batches),
+                return_exceptions=True
+            )
+        )
+        
+        outcomes = list(zip(singles, single_outcomes))
+        for batch, outcome in zip(batches, batch_outcomes):
+            if isinstance(outcome, Exception):
+                outcomes.extend((change, outcome) for change in batch)
+            else:
+                outcomes.extend(zip(batch, outcome))
+        return outcomes
+    
+    def _insert_batch(self, batch: List[FileChange]) -> List[bool]:
+        """Insert added files in one request, retrying documents the server rejected individually"""
+        metadatas = [
+            {
+                "file_path": change.path,
+                "change_type": change.change_type.value,
+                "content_hash": change.content_hash
+            }
+            for change in batch
+        ]
+        inserted = self.client.insert_documents([change.content for change in batch], metadatas)
+        if inserted is None:
+            # The request itself failed; retrying each document would only repeat the error
+            return [False] * len(batch)
+        
+        return [
+            ok or self._handle_added_file(change, self._get_document_id(change.path))
+            for change, ok in zip(batch, inserted)
+        ]
+    
     def _process_single_change(self, change: FileChange) -> bool:
         """Process a single file change"""
-        doc_id = self._get_document_id(change.path)
-        
-        if change.change_type == ChangeType.ADDED:
-            return self._handle_added_file(change, doc_id)
-        elif change.change_type == ChangeType.MODIFIED:
-            return self._handle_modified_file(change, doc_id)
-        elif change.change_type == ChangeType.DELETED:
-            return self._handle_deleted_file(change, doc_id)
-        elif change.change_type == ChangeType.RENAMED:
-            return self._handle_renamed_file(change, doc_id)
+        if change.unchanged:
+            return True
         
-        return False
+        return self._handlers[change.change_type](change, self._get_document_id(change.path))
     
     def _handle_added_file(self, change: FileChange, doc_id: str) -> bool:
         """Handle newly added file"""
         if not change.content:
-            self.logger.warning(f"No content available for added file: {change.path}")
+            self.logger.warning("No content available for added file: %s", change.path)
             return False
         
         metadata = {
@@ -449,7 +797,7 @@ class DocumentProcessor:
     def _handle_modified_file(self, change: FileChange, doc_id: str) -> bool:
         """Handle modified file"""
         if not change.content:
-            self.logger.warning(f"No content available for modified file: {change.path}")
+            self.logger.warning("No content available for modified file: %s", change.path)
             return False
         
         metadata = {
@@ -461,7 +809,7 @@ class DocumentProcessor:
         # Try to update first, if that fails, insert as new
         success = self.client.update_document(doc_id, change.content, metadata)
         if not success:
-            self.logger.info(f"Update failed for {change.path}, trying insert")
+            self.logger.info("Update failed for %s, trying insert", change.path)
             success = self.client.insert_document(change.content, metadata)
         
         return success
@@ -492,7 +840,7 @@ class DocumentProcessor:
     
     def _get_document_id(self, file_path: str) -> str:
         """Generate a consistent document ID from file path"""
-        return hashlib.md5(file_path.encode()).hexdigest()
+        return _doc_id(file_path)
 
 
 class DocSyncSystem:
@@ -500,35 +848,164 @@ class DocSyncSystem:
     
     def __init__(self, config: Config, repo_path: str = "."):
         self.config = config
-        self.git_analyzer = GitAnalyzer(config, repo_path)
+        self.repo_path = Path(repo_path).resolve()
+        self.cache_path = HashCache.default_path(self.repo_path)
+        self.hash_cache = HashCache.load(self.cache_path)
+        self.git_analyzer = GitAnalyzer(config, repo_path, self.hash_cache)
         self.lightrag_client = LightRAGClient(config)
         self.processor = DocumentProcessor(config, self.lightrag_client)
         self.logger = logging.getLogger(__name__)
     
+    QUEUE_SIZE = 256
+    
+    def _sync_diff(self, diff_args: List[str], rev: str, totals: Dict[str, int]):
+        """Sync one diff into `totals`, raising CalledProcessError if git fails"""
+        asyncio.run(self._sync_pipeline(diff_args, rev, totals))
+    
+    async def _sync_pipeline(self, diff_args: List[str], rev: str, totals: Dict[str, int]):
+        """Overlap diff parsing, content reads and API calls
+        
+        A thread streams the diff into `skeletons`, reader tasks fill in content
+        on the executor and pass changes on through `ready`, and every batch_size
+        ready changes are processed while the rest of the diff is still being read.
+        """
+        loop = asyncio.get_running_loop()
+        skeletons: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        ready: asyncio.Queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        reader_count = max(1, min(os.cpu_count() or 1, self.config.max_concurrency))
+        batch_size = max(1, self.config.batch_size)
+        # Bound the chunks in flight so memory stays flat on huge diffs
+        in_flight = asyncio.Semaphore(self.config.max_concurrency)
+        # Set when the readers fail, so the producer thread stops feeding them
+        stop = threading.Event()
+        
+        def put(queue: asyncio.Queue, item: Optional[FileChange]):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+        
+        def produce():
+            try:
+                for change in self.git_analyzer.iter_changes(diff_args):
+                    if stop.is_set():
+                        return
+                    put(skeletons, change)
+            finally:
+                if not stop.is_set():
+                    for _ in range(reader_count):
+                        put(skeletons, None)
+        
+        async def discard(queue: asyncio.Queue):
+            while True:
+                await queue.get()
+        
+        async def read(executor: ThreadPoolExecutor):
+            while (change := await skeletons.get()) is not None:
+                await ready.put(await loop.run_in_executor(executor, self.git_analyzer.materialize_content, change, rev))
+        
+        async def process(chunk: List[FileChange], executor: ThreadPoolExecutor):
+            try:
+                await self._process_chunk(chunk, executor, totals)
+            finally:
+                in_flight.release()
+        
+        async def send(executor: ThreadPoolExecutor):
+            tasks = []
+            chunk: List[FileChange] = []
+            while True:
+                change = await ready.get()
+                if change is not None:
+                    chunk.append(change)
+                if chunk and (change is None or len(chunk) >= batch_size):
+                    await in_flight.acquire()
+                    tasks.append(asyncio.create_task(process(chunk, executor)))
+                    chunk = []
+                if change is None:
+                    break
+            await asyncio.gather(*tasks)
+        
+        with ThreadPoolExecutor(max_workers=self.config.max_concurrency) as executor:
+            sender = asyncio.create_task(send(executor))
+            # git diff is a blocking pipe, so it gets its own thread outside the pool
+            producer = loop.run_in_executor(None, produce)
+            readers = [asyncio.create_task(read(executor)) for _ in range(reader_count)]
+            try:
+                await asyncio.gather(*readers)
+            except BaseException:
+                stop.set()
+                for reader in readers:
+                    reader.cancel()
+                # Keep the queue moving until the producer notices, in case it is
+                # blocked on a full queue; otherwise its thread would never finish
+                drain = asyncio.create_task(discard(skeletons))
+                await asyncio.wait([producer])
+                drain.cancel()
+                raise
+            finally:
+                await ready.put(None)
+                await sender
+            await producer
+    
+    async def _process_chunk(self, chunk: List[FileChange], executor: ThreadPoolExecutor, totals: Dict[str, int]):
+        """Process changes and remember their hashes once the whole chunk has synced"""
+        results = await self.processor.process_changes_async(chunk, executor)
+        
+        # Partial failures leave the cache alone so a retry resends the chunk
+        if not self.config.dry_run and results["failed"] == 0:
+            self.hash_cache.record(chunk)
+        
+        for key in totals:
+            totals[key] += results[key]
+    
+    def _rev_parse(self, rev: str) -> Optional[str]:
+        """Resolve a revision to its commit hash, or None if it doesn't resolve"""
+        # Goes through the analyzer's long-lived cat-file process instead of spawning rev-parse
+        return self.git_analyzer.resolve_commit(rev)
+    
+    def _current_head(self) -> Optional[str]:
+        return self._rev_parse("HEAD")
+    
     def sync_since_commit(self, commit_hash: str) -> Dict[str, int]:
         """Sync changes since a specific commit"""
-        self.logger.info(f"Analyzing changes since commit: {commit_hash}")
+        self.logger.info("Analyzing changes since commit: %s", commit_hash)
+        
+        # Nothing can have changed since HEAD itself, so skip the API and the diff
+        head = self._current_head()
+        if head and self._rev_parse(commit_hash) == head:
+            self.logger.info("Already at %s, nothing to sync", head)
+            return {"processed": 0, "failed": 0, "skipped": 0}
         
         # Check API health
         if not self.lightrag_client.health_check():
             raise RuntimeError("LightRAG API is not accessible")
         
-        changes = self.git_analyzer.get_changes_since_commit(commit_hash)
-        self.logger.info(f"Found {len(changes)} documentation changes")
+        # Old base commits can span thousands of files, so sync window by window
+        totals = {"processed": 0, "failed": 0, "skipped": 0}
+        synced = False
+        try:
+            for start, end in self.git_analyzer.commit_windows(commit_hash):
+                self._sync_diff([start, end], end, totals)
+                synced = True
+        except subprocess.CalledProcessError as e:
+            self.logger.error("Git command failed: %s", e)
+            # Keep whatever hashes were synced, but don't claim HEAD was reached
+            synced = False
+        
+        self.logger.info("Synced %d documentation changes", sum(totals.values()))
         
-        return self.processor.process_changes(changes)
+        # Only a completed diff up to HEAD proves the knowledge base reached it
+        if synced and head and not self.config.dry_run and totals["failed"] == 0:
+            self.hash_cache.record_head(head)
+        self.hash_cache.save(self.cache_path)
+        
+        return totals
     
     def sync_between_commits(self, from_commit: str, to_commit: str) -> Dict[str, int]:
         """Sync changes between two commits"""
-        self.logger.info(f"Analyzing changes between {from_commit} and {to_commit}")
+        self.logger.info("Analyzing changes between %s and %s", from_commit, to_commit)
         
         if not self.lightrag_client.health_check():
             raise RuntimeError("LightRAG API is not accessible")
         
-        changes = self.git_analyzer.get_changes_between_commits(from_commit, to_commit)
-        self.logger.info(f"Found {len(changes)} documentation changes")
-        
-        return self.processor.process_changes(changes)
+        return self._sync_once([from_commit, to_commit], to_commit)
     
     def sync_staged_changes(self) -> Dict[str, int]:
         """Sync currently staged changes"""
@@ -537,10 +1014,24 @@ class DocSyncSystem:
         if not self.lightrag_client.health_check():
             raise RuntimeError("LightRAG API is not accessible")
         
-        changes = self.git_analyzer.get_staged_changes()
-        self.logger.info(f"Found {len(changes)} staged documentation changes")
+        return self._sync_once(["--cached"], "")
+    
+    def _sync_once(self, diff_args: List[str], rev: str) -> Dict[str, int]:
+        """Sync a single diff and save the hash cache"""
+        totals = {"processed": 0, "failed": 0, "skipped": 0}
+        try:
+            self._sync_diff(diff_args, rev, totals)
+        except subprocess.CalledProcessError as e:
+            self.logger.error("Git command failed: %s", e)
         
-        return self.processor.process_changes(changes)
+        self.logger.info("Synced %d documentation changes", sum(totals.values()))
+        self.hash_cache.save(self.cache_path)
+        return totals
+    
+    def close(self):
+        """Release the git process and API connections"""
+        self.git_analyzer.close()
+        self.lightrag_client.close()
 
 
 def setup_logging(config: Config):
@@ -564,7 +1055,7 @@ def create_default_config_file(config_path: str):
     config_dict = asdict(config)
     
     with open(config_path, 'w') as f:
-        yaml.safe_dump(config_dict, f, default_flow_style=False)
+        yaml.dump(config_dict, f, Dumper=SafeDumper, default_flow_style=False)
     
     print(f"Default configuration created at: {config_path}")
 
@@ -613,7 +1104,7 @@ def main():
     mode_group.add_argument(
         "--staged",
         action="store_true",
-        help="Sync staged changes"
+        help="Sync staged changes (the default until a commit sync has been recorded)"
     )
     
     parser.add_argument(
@@ -622,6 +1113,12 @@ def main():
         help="Show what would be done without making changes"
     )
     
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        help="Maximum concurrent API requests (overrides max_concurrency)"
+    )
+    
     args = parser.parse_args()
     
     # Create default config if requested
@@ -631,9 +1128,9 @@ def main():
     
     # Load configuration
     try:
-        if os.path.exists(args.config):
+        try:
             config = Config.from_file(args.config)
-        else:
+        except FileNotFoundError:
             print(f"Configuration file not found: {args.config}")
             print("Use --create-config to create a default configuration file")
             return 1
@@ -642,6 +1139,9 @@ def main():
         if args.dry_run:
             config.dry_run = True
         
+        if args.max_workers:
+            config.max_concurrency = args.max_workers
+        
         setup_logging(config)
         
         # Initialize the system
@@ -649,15 +1149,21 @@ def main():
         
         # Execute based on mode
         results = None
-        if args.since_commit:
-            results = system.sync_since_commit(args.since_commit)
-        elif args.between_commits:
-            results = system.sync_between_commits(args.between_commits[0], args.between_commits[1])
-        elif args.staged:
-            results = system.sync_staged_changes()
-        else:
-            # Default: sync staged changes
-            results = system.sync_staged_changes()
+        try:
+            if args.since_commit:
+                results = system.sync_since_commit(args.since_commit)
+            elif args.between_commits:
+                results = system.sync_between_commits(args.between_commits[0], args.between_commits[1])
+            elif args.staged:
+                results = system.sync_staged_changes()
+            elif system.hash_cache.last_synced_head:
+                # Default: pick up from the last commit that was synced
+                results = system.sync_since_commit(system.hash_cache.last_synced_head)
+            else:
+                # Otherwise sync staged changes
+                results = system.sync_staged_changes()
+        finally:
+            system.close()
         
         # Print results
         if results:
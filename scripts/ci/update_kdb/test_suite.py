@@ -6,25 +6,208 @@ This test suite provides comprehensive testing for all components of the
 documentation synchronization system.
 
 Run with: python -m pytest test_docsync.py -v
+(in this repository: python -m pytest scripts/ci/update_kdb/test_suite.py)
+
+Git fixtures live under pytest's tmp_path_factory, so on Linux CI they can be
+kept in memory with:
+
+    PYTEST_ADDOPTS="--basetemp=/dev/shm/pytest -o cache_dir=/dev/shm/.pytest_cache"
+
+The tests are independent, so with pytest-xdist installed they can be spread
+across cores with `-n auto --dist=loadscope`. Session-scoped baseline
+repositories are then built once per worker; `loadscope` keeps each test
+class on a single worker, whereas `loadfile` would put this whole module on one.
 """
 
-import os
-import tempfile
-import shutil
 import subprocess
+import threading
+import time
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import pytest
 import json
 import hashlib
+from dataclasses import dataclass, field, replace
+from typing import Callable, Optional
+import orjson
+import requests
+import yaml
 
 # Import the main modules (assuming they're in the same directory)
 from docsync import (
     Config, GitAnalyzer, LightRAGClient, DocumentProcessor, 
-    DocSyncSystem, FileChange, ChangeType
+    DocSyncSystem, FileChange, ChangeType, HashCache, _doc_id, _content_digest
 )
 
 
+# Identity for commits, passed as config overrides instead of per-repo `git config` calls
+GIT_IDENTITY = ["-c", "user.email=test@example.com", "-c", "user.name=Test User"]
+
+
+def fast_import_stream(files: dict, message: str = "Initial commit", parent: Optional[str] = None) -> bytes:
+    """Build a `git fast-import` stream committing `files` to refs/heads/main
+    
+    A `parent` revision makes the commit build on that tree, and a file whose
+    content is None is deleted from it.
+    """
+    def data(payload: bytes) -> bytes:
+        return b"data %d\n%s\n" % (len(payload), payload)
+    
+    blobs = [b"blob\nmark :%d\n%s" % (mark, data(content.encode()))
+             for mark, content in enumerate(files.values(), 1) if content is not None]
+    commit = [
+        b"commit refs/heads/main\n",
+        b"committer Test User <test@example.com> 1700000000 +0000\n",
+        data(message.encode()),
+        b"from %s\n" % parent.encode() if parent else b"",
+        *(b"D %s\n" % path.encode() if content is None else b"M 100644 :%d %s\n" % (mark, path.encode())
+          for mark, (path, content) in enumerate(files.items(), 1)),
+    ]
+    return b"".join(blobs) + b"".join(commit)
+
+
+def build_repo(repo_path: Path, files: dict) -> Path:
+    """Create a bare repository with `files` in a single initial commit"""
+    subprocess.run(["git", "init", "-q", "--bare", "--initial-branch=main", str(repo_path)], check=True)
+    subprocess.run(["git", "fast-import", "--quiet"], input=fast_import_stream(files), cwd=repo_path, check=True)
+    return repo_path
+
+
+def commit_files(repo_path: Path, files: dict, message: str):
+    """Commit `files` on top of main in one process, without touching the index or working tree"""
+    subprocess.run(
+        ["git", "fast-import", "--quiet"],
+        input=fast_import_stream(files, message, parent="refs/heads/main^0"), cwd=repo_path, check=True
+    )
+
+
+def head_commit(repo_path: Path) -> str:
+    """Resolve a repository's HEAD, for session fixtures to compute once"""
+    return subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=repo_path, stdout=subprocess.PIPE, check=True
+    ).stdout.strip().decode()
+
+
+def clone_repo(baseline: Path, repo_path: Path) -> Path:
+    """Give a test its own copy of a baseline repository, sharing objects through hardlinks"""
+    subprocess.run(
+        ["git", "clone", "-q", "--local", *GIT_IDENTITY, str(baseline), str(repo_path)],
+        check=True
+    )
+    return repo_path
+
+
+def collect_changes(analyzer: GitAnalyzer, diff_args: list, rev: str) -> list:
+    """Diff and read changes the way the sync pipeline does, one at a time"""
+    return [analyzer.materialize_content(change, rev) for change in analyzer.iter_changes(diff_args)]
+
+
+@pytest.fixture(scope="session")
+def _baseline_repo(tmp_path_factory):
+    """Repository built once per session that `temp_repo` clones from"""
+    return build_repo(tmp_path_factory.mktemp("baseline") / "repo", {
+        "docs/readme.md": "# Initial content"
+    })
+
+
+@pytest.fixture(scope="session")
+def baseline_head(_baseline_repo):
+    """HEAD of the baseline repository, which every `temp_repo` clone starts at"""
+    return head_commit(_baseline_repo)
+
+
+@dataclass
+class StubClient:
+    """Stand-in for LightRAGClient that records calls and returns canned results
+    
+    A result that is an exception instance is raised instead of returned.
+    """
+    health_ret: bool = True
+    insert_ret: object = True
+    insert_batch_ret: object = True  # True: every document succeeds; None: the request fails
+    update_ret: object = True
+    delete_ret: object = True
+    on_call: Optional[Callable[[str], None]] = None
+    calls: list = field(default_factory=list)
+    
+    def _call(self, name, args, result):
+        self.calls.append((name, args))
+        if self.on_call:
+            self.on_call(name)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def called(self, name) -> list:
+        """Arguments of every call to `name`, in order"""
+        return [args for called_name, args in self.calls if called_name == name]
+    
+    def health_check(self):
+        return self._call("health_check", (), self.health_ret)
+    
+    def close(self):
+        pass
+    
+    def insert_document(self, content, metadata=None):
+        return self._call("insert_document", (content, metadata), self.insert_ret)
+    
+    def insert_documents(self, contents, metadatas):
+        result = self.insert_batch_ret
+        return self._call("insert_documents", (contents, metadatas),
+                          [True] * len(contents) if result is True else result)
+    
+    def update_document(self, doc_id, content, metadata=None):
+        return self._call("update_document", (doc_id, content, metadata), self.update_ret)
+    
+    def delete_document(self, doc_id):
+        return self._call("delete_document", (doc_id,), self.delete_ret)
+
+
+SAMPLE_CONFIG = {
+    "watch_directories": ["test/"],
+    "file_extensions": [".txt"],
+    "exclude_patterns": ["**/temp/**"],
+    "api_base_url": "http://test:8080",
+    "api_timeout": 60,
+    "batch_size": 5,
+    "dry_run": True,
+    "log_level": "DEBUG",
+    "log_file": "test.log"
+}
+
+
+@pytest.fixture(scope="session")
+def sample_config_yaml(tmp_path_factory):
+    """SAMPLE_CONFIG written once per session; JSON is valid YAML and much cheaper to dump"""
+    config_path = tmp_path_factory.mktemp("config") / "docsync.yaml"
+    config_path.write_text(json.dumps(SAMPLE_CONFIG))
+    return config_path
+
+
+@pytest.fixture(scope="session")
+def default_config():
+    """Default configuration shared by all tests; copy it with `replace` before mutating"""
+    return Config.default()
+
+
+@pytest.fixture(scope="session")
+def _integration_baseline(tmp_path_factory):
+    """More complex repository built once per session that `integration_repo` clones from"""
+    return build_repo(tmp_path_factory.mktemp("integration") / "repo", {
+        "docs/readme.md": "# Main Documentation",
+        "docs/api/auth.md": "# Authentication",
+        "docs/guide.markdown": "# User Guide",
+        "src/main.py": "# Python source",
+        "docs/temp/cache.md": "# Temp file"
+    })
+
+
+@pytest.fixture(scope="session")
+def integration_head(_integration_baseline):
+    """HEAD of the integration baseline, which every `integration_repo` clone starts at"""
+    return head_commit(_integration_baseline)
+
+
 class TestConfig:
     """Test configuration management"""
     
@@ -38,112 +221,152 @@ class TestConfig:
         assert config.batch_size == 10
         assert not config.dry_run
     
-    def test_config_from_file(self):
+    def test_config_from_file(self, sample_config_yaml):
         """Test loading configuration from YAML file"""
-        config_data = {
-            "watch_directories": ["test/"],
-            "file_extensions": [".txt"],
-            "exclude_patterns": ["**/temp/**"],
-            "api_base_url": "http://test:8080",
-            "api_timeout": 60,
-            "batch_size": 5,
-            "dry_run": True,
-            "log_level": "DEBUG",
-            "log_file": "test.log"
-        }
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
-            import yaml
-            yaml.safe_dump(config_data, f)
-            config_path = f.name
-        
-        try:
-            config = Config.from_file(config_path)
-            assert config.watch_directories == ["test/"]
-            assert config.file_extensions == [".txt"]
-            assert config.api_base_url == "http://test:8080"
-            assert config.api_timeout == 60
-            assert config.dry_run is True
-        finally:
-            os.unlink(config_path)
+        config = Config.from_file(str(sample_config_yaml))
+        
+        assert config.watch_directories == ["test/"]
+        assert config.file_extensions == [".txt"]
+        assert config.api_base_url == "http://test:8080"
+        assert config.api_timeout == 60
+        assert config.dry_run is True
+    
+    def test_config_from_file_parses_once(self, tmp_path):
+        """Test that reloading an unchanged file skips the YAML parse"""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text(json.dumps(SAMPLE_CONFIG))
+        
+        with patch("docsync.yaml.load", wraps=yaml.load) as mock_load:
+            first = Config.from_file(str(config_file))
+            second = Config.from_file(str(config_file))
+            
+            assert mock_load.call_count == 1
+            assert first == second
+            # Each load still hands out its own copy
+            assert first.watch_directories is not second.watch_directories
+            
+            # A rewrite of a different size is parsed again even within the same mtime tick
+            config_file.write_text(json.dumps({**SAMPLE_CONFIG, "api_timeout": 1200}))
+            assert Config.from_file(str(config_file)).api_timeout == 1200
+            assert mock_load.call_count == 2
+
+
+# Exclude patterns added to the default ones for the filtering cases: a basename,
+# relative directories with and without a trailing slash, and a root-anchored path
+EXTRA_EXCLUDES = ["CHANGELOG.md", "drafts/*", "docs/private/*", "archive/", "/docs/root-only.md"]
+
+# (path, expected) pairs for GitAnalyzer._should_process_file with EXTRA_EXCLUDES
+PATH_FILTER_CASES = [
+    # Markdown files under watched directories
+    ("docs/test.md", True),
+    ("docs/readme.md", True),
+    ("docs/guide.markdown", True),
+    ("docs/api/auth.md", True),
+    ("docs/deep/nested/tree/page.md", True),
+    ("docs/deep/nested/b.markdown", True),
+    ("documentation/guide.markdown", True),
+    ("documentation/index.md", True),
+    ("documentation/v2/changelog.md", True),
+    ("docs/with space.md", True),
+    ("docs/unicode-é.md", True),
+    ("docs/.hidden.md", True),
+    ("docs/buildings/plan.md", True),
+    ("docs/node_modules_old/notes.md", True),
+    ("docs/git/usage.md", True),
+    ("docs/a.b.c.md", True),
+    # Other extensions
+    ("docs/test.txt", False),
+    ("docs/image.png", False),
+    ("docs/script.py", False),
+    ("docs/page.html", False),
+    ("docs/page.rst", False),
+    ("docs/data.json", False),
+    ("docs/README.MD", False),
+    ("docs/notes.Markdown", False),
+    ("docs/draft.md.bak", False),
+    ("docs/draft.md~", False),
+    ("docs/archive.mdx", False),
+    ("docs/md", False),
+    ("documentation/diagram.svg", False),
+    # Excluded patterns
+    ("docs/node_modules/test.md", False),
+    ("docs/node_modules/pkg/readme.md", False),
+    ("docs/api/node_modules/pkg/readme.md", False),
+    ("docs/build/index.md", False),
+    ("docs/site/build/index.md", False),
+    ("documentation/build/guide.markdown", False),
+    ("docs/.git/notes.md", False),
+    ("documentation/sub/.git/info.md", False),
+    (".git/test.md", False),
+    (".git/HEAD", False),
+    # Basename patterns match at any depth, but only whole names
+    ("docs/CHANGELOG.md", False),
+    ("docs/x/CHANGELOG.md", False),
+    ("docs/OLD_CHANGELOG.md", True),
+    # Relative directory patterns match below any directory; `*` stays in one segment
+    ("docs/drafts/a.md", False),
+    ("docs/api/drafts/b.md", False),
+    ("docs/drafts/sub/a.md", True),
+    ("docs/olddrafts/a.md", True),
+    ("docs/private/b.md", False),
+    ("docs/private/sub/b.md", True),
+    # A trailing slash excludes everything below the directory
+    ("docs/archive/old.md", False),
+    ("docs/archive/2020/old.md", False),
+    ("docs/archived.md", True),
+    # A leading slash anchors the pattern at the repository root
+    ("docs/root-only.md", False),
+    ("docs/sub/docs/root-only.md", True),
+    # Outside watched directories
+    ("src/test.md", False),
+    ("src/main.py", False),
+    ("README.md", False),
+    ("docs.md", False),
+    ("docsite/page.md", False),
+    ("documents/page.md", False),
+    ("src/docs/page.md", False),
+    ("node_modules/x/y.md", False),
+    ("build/docs/page.md", False),
+    ("Docs/page.md", False),
+    ("doc/page.md", False),
+]
+
+
+@pytest.fixture(scope="module")
+def path_filter(default_config):
+    """Analyzer shared by the filtering cases; filtering never touches the repository"""
+    config = replace(default_config, exclude_patterns=[*default_config.exclude_patterns, *EXTRA_EXCLUDES])
+    with GitAnalyzer(config) as analyzer:
+        yield analyzer
 
 
 class TestGitAnalyzer:
     """Test Git repository analysis functionality"""
     
     @pytest.fixture
-    def temp_repo(self):
+    def temp_repo(self, _baseline_repo, tmp_path):
         """Create a temporary Git repository for testing"""
-        temp_dir = tempfile.mkdtemp()
-        repo_path = Path(temp_dir)
-        
-        # Initialize git repo
-        subprocess.run(["git", "init"], cwd=repo_path, check=True, capture_output=True)
-        subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=repo_path, check=True)
-        subprocess.run(["git", "config", "user.name", "Test User"], cwd=repo_path, check=True)
-        
-        # Create initial structure
-        docs_dir = repo_path / "docs"
-        docs_dir.mkdir()
-        
-        # Create initial file
-        (docs_dir / "readme.md").write_text("# Initial content")
-        
-        # Initial commit
-        subprocess.run(["git", "add", "."], cwd=repo_path, check=True)
-        subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=repo_path, check=True)
-        
-        yield repo_path
-        
-        # Cleanup
-        shutil.rmtree(temp_dir)
+        return clone_repo(_baseline_repo, tmp_path / "repo")
     
-    def test_should_process_file(self, temp_repo):
+    @pytest.mark.parametrize("path,expected", PATH_FILTER_CASES)
+    def test_should_process_file(self, path_filter, path, expected):
         """Test file filtering logic"""
-        config = Config.default()
-        analyzer = GitAnalyzer(config, str(temp_repo))
-        
-        # Should process MD files in docs/
-        assert analyzer._should_process_file("docs/test.md")
-        assert analyzer._should_process_file("documentation/guide.markdown")
-        
-        # Should not process other extensions
-        assert not analyzer._should_process_file("docs/test.txt")
-        assert not analyzer._should_process_file("docs/image.png")
-        
-        # Should not process excluded patterns
-        assert not analyzer._should_process_file("docs/node_modules/test.md")
-        assert not analyzer._should_process_file(".git/test.md")
-        
-        # Should not process files outside watched directories
-        assert not analyzer._should_process_file("src/test.md")
+        assert path_filter._should_process_file(path) is expected
     
-    def test_get_changes_since_commit(self, temp_repo):
+    def test_changes_since_commit(self, temp_repo, baseline_head, default_config):
         """Test detecting changes since a specific commit"""
-        config = Config.default()
+        config = default_config
         analyzer = GitAnalyzer(config, str(temp_repo))
         
-        # Get initial commit hash
-        result = subprocess.run(
-            ["git", "rev-parse", "HEAD"], 
-            cwd=temp_repo, 
-            capture_output=True, 
-            text=True, 
-            check=True
-        )
-        initial_commit = result.stdout.strip()
-        
         # Make changes
-        docs_dir = temp_repo / "docs"
-        (docs_dir / "new.md").write_text("# New document")
-        (docs_dir / "readme.md").write_text("# Updated content")
-        (docs_repo / "not_docs.md").write_text("# Should be ignored")
-        
-        subprocess.run(["git", "add", "."], cwd=temp_repo, check=True)
-        subprocess.run(["git", "commit", "-m", "Add changes"], cwd=temp_repo, check=True)
+        commit_files(temp_repo, {
+            "docs/new.md": "# New document",
+            "docs/readme.md": "# Updated content",
+            "not_docs.md": "# Should be ignored",
+        }, "Add changes")
         
         # Test change detection
-        changes = analyzer.get_changes_since_commit(initial_commit)
+        changes = collect_changes(analyzer, [baseline_head, "HEAD"], "HEAD")
         
         # Should detect changes in docs/ but not root
         doc_changes = [c for c in changes if c.path.startswith("docs/")]
@@ -154,9 +377,60 @@ class TestGitAnalyzer:
         assert change_paths["docs/new.md"] == ChangeType.ADDED
         assert change_paths["docs/readme.md"] == ChangeType.MODIFIED
     
-    def test_get_staged_changes(self, temp_repo):
+    def test_commit_windows(self, temp_repo, baseline_head, default_config):
+        """Test that commits since a base are split into doubling windows"""
+        analyzer = GitAnalyzer(default_config, str(temp_repo))
+        
+        for i, name in enumerate(["a.md", "b.md", "a.md"]):
+            commit_files(temp_repo, {f"docs/{name}": f"# Revision {i}"}, f"Commit {i}")
+        
+        windows = [
+            collect_changes(analyzer, [start, end], end)
+            for start, end in analyzer.commit_windows(baseline_head, initial=1)
+        ]
+        
+        # One commit, then the remaining two
+        assert [[(c.path, c.change_type) for c in w] for w in windows] == [
+            [("docs/a.md", ChangeType.ADDED)],
+            [("docs/a.md", ChangeType.MODIFIED), ("docs/b.md", ChangeType.ADDED)],
+        ]
+        assert windows[1][0].content == "# Revision 2"
+    
+    def test_commit_windows_non_ancestor(self, temp_repo, baseline_head, default_config):
+        """Test that a base commit off HEAD's history is diffed against HEAD in one window"""
+        analyzer = GitAnalyzer(default_config, str(temp_repo))
+        
+        # Commit on main, then rewind main so that commit is no longer an ancestor
+        commit_files(temp_repo, {"docs/dropped.md": "# Dropped"}, "Rewritten away")
+        orphaned = head_commit(temp_repo)
+        subprocess.run(["git", "update-ref", "refs/heads/main", baseline_head], cwd=temp_repo, check=True)
+        commit_files(temp_repo, {"docs/kept.md": "# Kept"}, "Replacement")
+        head = head_commit(temp_repo)
+        
+        assert list(analyzer.commit_windows(orphaned)) == [(orphaned, head)]
+        assert list(analyzer.commit_windows(head)) == []
+        
+        changes = collect_changes(analyzer, [orphaned, head], head)
+        assert [(c.path, c.change_type) for c in changes] == [
+            ("docs/dropped.md", ChangeType.DELETED),
+            ("docs/kept.md", ChangeType.ADDED),
+        ]
+    
+    def test_renames_detected_without_diff_renames(self, temp_repo, default_config):
+        """Test that a moved file is one rename even when diff.renames is off"""
+        subprocess.run(["git", "config", "diff.renames", "false"], cwd=temp_repo, check=True)
+        subprocess.run(["git", "mv", "docs/readme.md", "docs/intro.md"], cwd=temp_repo, check=True)
+        
+        changes = collect_changes(GitAnalyzer(default_config, str(temp_repo)), ["--cached"], "")
+        
+        assert len(changes) == 1
+        assert changes[0].change_type == ChangeType.RENAMED
+        assert changes[0].old_path == "docs/readme.md"
+        assert changes[0].path == "docs/intro.md"
+    
+    def test_staged_changes(self, temp_repo, default_config):
         """Test detecting staged changes"""
-        config = Config.default()
+        config = default_config
         analyzer = GitAnalyzer(config, str(temp_repo))
         
         # Make changes and stage them
@@ -166,116 +440,219 @@ class TestGitAnalyzer:
         subprocess.run(["git", "add", "docs/staged.md"], cwd=temp_repo, check=True)
         
         # Test staged change detection
-        changes = analyzer.get_staged_changes()
+        changes = collect_changes(analyzer, ["--cached"], "")
         
         assert len(changes) == 1
         assert changes[0].path == "docs/staged.md"
         assert changes[0].change_type == ChangeType.ADDED
         assert changes[0].content == "# Staged document"
+    
+    def test_unchanged_content_is_flagged(self, temp_repo, default_config):
+        """Test that content matching the hash cache is marked unchanged"""
+        config = default_config
+        
+        (temp_repo / "docs" / "staged.md").write_text("# Staged document")
+        subprocess.run(["git", "add", "docs/staged.md"], cwd=temp_repo, check=True)
+        
+        first = collect_changes(GitAnalyzer(config, str(temp_repo)), ["--cached"], "")
+        cache = HashCache({"docs/staged.md": first[0].content_hash})
+        
+        changes = collect_changes(GitAnalyzer(config, str(temp_repo), cache), ["--cached"], "")
+        
+        assert changes[0].unchanged
+        assert changes[0].content is None
+        assert not first[0].unchanged
+
+
+class TestHashCache:
+    """Test the persisted content hash cache"""
+    
+    @pytest.mark.parametrize("use_blake3", [True, False], ids=["blake3", "blake2b"])
+    def test_content_digest_names_its_algorithm(self, use_blake3):
+        """Test that digests from different algorithms can never compare equal"""
+        if use_blake3:
+            blake3 = pytest.importorskip("blake3")
+            assert _content_digest(b"# Doc") == "blake3:" + blake3.blake3(b"# Doc").hexdigest()
+        else:
+            with patch("docsync.blake3", None):
+                digest = _content_digest(b"# Doc")
+            assert digest == "blake2b:" + hashlib.blake2b(b"# Doc", digest_size=16).hexdigest()
+    
+    def test_record_and_reload(self, tmp_path):
+        """Test that recorded changes survive a save/load round trip"""
+        cache_path = tmp_path / HashCache.FILENAME
+        cache = HashCache.load(cache_path)
+        
+        cache.record([
+            FileChange("docs/a.md", ChangeType.ADDED, content_hash="aaa"),
+            FileChange("docs/new.md", ChangeType.RENAMED, old_path="docs/b.md", content_hash="bbb")
+        ])
+        cache.save(cache_path)
+        
+        reloaded = HashCache.load(cache_path)
+        assert reloaded.hashes == {"docs/a.md": "aaa", "docs/new.md": "bbb"}
+        assert reloaded.last_synced_head is None
+        
+        reloaded.record([FileChange("docs/a.md", ChangeType.DELETED)])
+        assert reloaded.get("docs/a.md") is None
+    
+    def test_load_corrupt_file(self, tmp_path):
+        """Test that an unreadable cache starts empty"""
+        cache_path = tmp_path / HashCache.FILENAME
+        cache_path.write_text("{not json")
+        
+        assert HashCache.load(cache_path).hashes == {}
+    
+    def test_cache_lives_in_git_dir(self, _baseline_repo, tmp_path, default_config):
+        """Test that the cache is kept out of the worktree so `git add -A` can't pick it up"""
+        repo = clone_repo(_baseline_repo, tmp_path / "repo")
+        system = DocSyncSystem(default_config, str(repo))
+        
+        assert system.cache_path == repo / ".git" / HashCache.FILENAME
+        
+        system.hash_cache.record_head("abc123")
+        system.hash_cache.save(system.cache_path)
+        status = subprocess.run(["git", "status", "--porcelain"], cwd=repo, stdout=subprocess.PIPE, check=True)
+        assert status.stdout == b""
+        system.close()
 
 
 class TestLightRAGClient:
     """Test LightRAG API client functionality"""
     
     @pytest.fixture
-    def mock_client(self):
-        """Create a LightRAG client with mocked requests"""
-        config = Config.default()
-        return LightRAGClient(config)
+    def mock_client(self, default_config):
+        """Create a LightRAG client with a mocked session"""
+        client = LightRAGClient(default_config)
+        with patch.object(client, "_session", autospec=True):
+            yield client
     
-    @patch('requests.get')
-    def test_health_check_success(self, mock_get, mock_client):
-        """Test successful health check"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_get.return_value = mock_response
-        
-        assert mock_client.health_check() is True
-        mock_get.assert_called_once_with(
-            "http://localhost:8020/health",
-            timeout=30
-        )
+    @pytest.mark.parametrize("verb,method,args,path,payload,status,expected", [
+        ("get", "health_check", (), "/health", None, 200, True),
+        ("get", "health_check", (), "/health", None, 503, False),
+        ("post", "insert_document", ("Test content", {"file_path": "test.md"}), "/insert",
+         {"input": "Test content", "metadata": {"file_path": "test.md"}}, 200, True),
+        ("post", "insert_document", ("Test content",), "/insert",
+         {"input": "Test content"}, 500, False),
+        ("put", "update_document", ("doc123", "Updated content"), "/update/doc123",
+         {"input": "Updated content"}, 200, True),
+        ("delete", "delete_document", ("doc123",), "/delete/doc123", None, 200, True),
+        ("delete", "delete_document", ("doc123",), "/delete/doc123", None, 404, False),
+    ])
+    def test_request(self, mock_client, verb, method, args, path, payload, status, expected):
+        """Test that each client method sends the right request and reports its status"""
+        mock_verb = getattr(mock_client._session, verb)
+        mock_verb.return_value = Mock(status_code=status, text="error")
+        
+        assert getattr(mock_client, method)(*args) is expected
+        
+        if payload is None:
+            mock_verb.assert_called_once_with(f"http://localhost:8020{path}", timeout=30)
+        else:
+            mock_verb.assert_called_once_with(
+                f"http://localhost:8020{path}",
+                data=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+                timeout=30
+            )
     
-    @patch('requests.get')
-    def test_health_check_failure(self, mock_get, mock_client):
+    def test_health_check_failure(self, mock_client):
         """Test failed health check"""
+        mock_get = mock_client._session.get
         mock_get.side_effect = Exception("Connection error")
         
         assert mock_client.health_check() is False
     
-    @patch('requests.post')
-    def test_insert_document_success(self, mock_post, mock_client):
-        """Test successful document insertion"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_post.return_value = mock_response
+    def test_health_check_cached(self, mock_client):
+        """Test that a recent successful health check is reused until a failed request"""
+        mock_get = mock_client._session.get
+        mock_get.return_value = Mock(status_code=200)
         
-        result = mock_client.insert_document(
-            "Test content", 
-            {"file_path": "test.md"}
-        )
+        assert mock_client.health_check() is True
+        assert mock_client.health_check() is True
+        assert mock_get.call_count == 1
         
-        assert result is True
-        mock_post.assert_called_once_with(
-            "http://localhost:8020/insert",
-            json={"input": "Test content", "metadata": {"file_path": "test.md"}},
-            timeout=30
-        )
+        assert mock_client.health_check(force=True) is True
+        assert mock_get.call_count == 2
+        
+        # Any 5xx response seen by the session invalidates the cached result
+        mock_client._track_health(Mock(status_code=503))
+        mock_get.return_value = Mock(status_code=503)
+        assert mock_client.health_check() is False
+        assert mock_client.health_check() is False
+        assert mock_get.call_count == 4
     
-    @patch('requests.post')
-    def test_insert_document_failure(self, mock_post, mock_client):
-        """Test failed document insertion"""
-        mock_response = Mock()
-        mock_response.status_code = 500
-        mock_response.text = "Internal server error"
-        mock_post.return_value = mock_response
+    @pytest.mark.parametrize("call, args", [
+        ("insert_document", ("Content",)),
+        ("insert_documents", (["Content"], [{}])),
+        ("update_document", ("doc1", "Content")),
+        ("delete_document", ("doc1",)),
+    ])
+    def test_request_exception_invalidates_health(self, mock_client, call, args):
+        """Test that a request raising before any response makes the next health check probe again"""
+        mock_get = mock_client._session.get
+        mock_get.return_value = Mock(status_code=200)
+        assert mock_client.health_check() is True
         
-        result = mock_client.insert_document("Test content")
+        error = requests.ConnectionError("Connection refused")
+        for method in (mock_client._session.post, mock_client._session.put, mock_client._session.delete):
+            method.side_effect = error
+        getattr(mock_client, call)(*args)
         
-        assert result is False
+        mock_get.side_effect = error
+        assert mock_client.health_check() is False
+        assert mock_get.call_count == 2
     
-    @patch('requests.put')
-    def test_update_document(self, mock_put, mock_client):
-        """Test document update"""
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_put.return_value = mock_response
-        
-        result = mock_client.update_document("doc123", "Updated content")
+    def test_client_error_invalidates_health(self, mock_client):
+        """Test that a 4xx response seen by the session also drops the cached health check"""
+        mock_client._session.get.return_value = Mock(status_code=200)
+        assert mock_client.health_check() is True
         
-        assert result is True
-        mock_put.assert_called_once_with(
-            "http://localhost:8020/update/doc123",
-            json={"input": "Updated content"},
-            timeout=30
-        )
+        mock_client._track_health(Mock(status_code=404))
+        assert mock_client.health_check() is True
+        assert mock_client._session.get.call_count == 2
     
-    @patch('requests.delete')
-    def test_delete_document(self, mock_delete, mock_client):
-        """Test document deletion"""
+    def test_insert_documents_batch(self, mock_client):
+        """Test inserting several documents in one request"""
+        mock_post = mock_client._session.post
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_delete.return_value = mock_response
+        mock_response.content = b"{}"
+        mock_post.return_value = mock_response
         
-        result = mock_client.delete_document("doc123")
+        result = mock_client.insert_documents(
+            ["First", "Second"],
+            [{"file_path": "a.md"}, {"file_path": "b.md"}]
+        )
         
-        assert result is True
-        mock_delete.assert_called_once_with(
-            "http://localhost:8020/delete/doc123",
+        assert result == [True, True]
+        mock_post.assert_called_once_with(
+            "http://localhost:8020/insert",
+            data=orjson.dumps({
+                "inputs": ["First", "Second"],
+                "metadatas": [{"file_path": "a.md"}, {"file_path": "b.md"}]
+            }),
+            headers={"Content-Type": "application/json"},
             timeout=30
         )
     
-    @patch('requests.post')
-    def test_search_documents(self, mock_post, mock_client):
+    def test_insert_documents_batch_failure(self, mock_client):
+        """Test that a rejected batch request is reported as a whole"""
+        mock_client._session.post.return_value = Mock(status_code=413, text="Payload too large")
+        
+        assert mock_client.insert_documents(["First", "Second"], [{}, {}]) is None
+    
+    def test_search_documents(self, mock_client):
         """Test document search"""
+        mock_post = mock_client._session.post
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = orjson.dumps({
             "results": [
                 {"id": "doc1", "content": "Result 1"},
                 {"id": "doc2", "content": "Result 2"}
             ]
-        }
+        })
         mock_post.return_value = mock_response
         
         results = mock_client.search_documents("test query", 5)
@@ -284,7 +661,8 @@ class TestLightRAGClient:
         assert results[0]["id"] == "doc1"
         mock_post.assert_called_once_with(
             "http://localhost:8020/search",
-            json={"query": "test query", "limit": 5},
+            data=orjson.dumps({"query": "test query", "limit": 5}),
+            headers={"Content-Type": "application/json"},
             timeout=30
         )
 
@@ -293,148 +671,172 @@ class TestDocumentProcessor:
     """Test document processing functionality"""
     
     @pytest.fixture
-    def mock_processor(self):
-        """Create a document processor with mocked client"""
-        config = Config.default()
-        mock_client = Mock(spec=LightRAGClient)
-        return DocumentProcessor(config, mock_client)
+    def mock_processor(self, default_config):
+        """Create a document processor with a stub client"""
+        return DocumentProcessor(replace(default_config), StubClient())
     
     def test_get_document_id(self, mock_processor):
         """Test document ID generation"""
+        _doc_id.cache_clear()
+        
         doc_id = mock_processor._get_document_id("docs/test.md")
-        expected_id = hashlib.md5("docs/test.md".encode()).hexdigest()
+        expected_id = hashlib.blake2b("docs/test.md".encode(), digest_size=16).hexdigest()
         assert doc_id == expected_id
-    
-    def test_handle_added_file(self, mock_processor):
-        """Test handling of added files"""
-        change = FileChange(
-            path="docs/new.md",
-            change_type=ChangeType.ADDED,
-            content="# New document",
-            content_hash="abc123"
-        )
-        
-        mock_processor.client.insert_document.return_value = True
         
-        result = mock_processor._handle_added_file(
-            change, 
-            "doc123"
-        )
+        # Repeated paths are served from the cache
+        assert mock_processor._get_document_id("docs/test.md") == expected_id
+        assert _doc_id.cache_info().hits == 1
+    
+    @pytest.mark.parametrize("change_kwargs,client_method,expected_args", [
+        (
+            {"path": "docs/new.md", "change_type": ChangeType.ADDED,
+             "content": "# New document", "content_hash": "abc123"},
+            "insert_document",
+            ("# New document", {"file_path": "docs/new.md", "change_type": "added", "content_hash": "abc123"})
+        ),
+        (
+            {"path": "docs/updated.md", "change_type": ChangeType.MODIFIED,
+             "content": "# Updated document", "content_hash": "def456"},
+            "update_document",
+            ("doc123", "# Updated document",
+             {"file_path": "docs/updated.md", "change_type": "modified", "content_hash": "def456"})
+        ),
+        (
+            {"path": "docs/deleted.md", "change_type": ChangeType.DELETED},
+            "delete_document",
+            ("doc123",)
+        ),
+        (
+            {"path": "docs/new_name.md", "change_type": ChangeType.RENAMED, "old_path": "docs/old_name.md",
+             "content": "# Renamed document", "content_hash": "ghi789"},
+            "insert_document",
+            ("# Renamed document", {"file_path": "docs/new_name.md", "change_type": "renamed",
+                                    "old_path": "docs/old_name.md", "content_hash": "ghi789"})
+        ),
+    ], ids=["added", "modified", "deleted", "renamed"])
+    def test_handle_file(self, mock_processor, change_kwargs, client_method, expected_args):
+        """Test that each change type reaches the right client call"""
+        change = FileChange(**change_kwargs)
+        
+        handler = getattr(mock_processor, f"_handle_{change.change_type.value}_file")
+        assert handler(change, "doc123") is True
+        
+        assert mock_processor.client.calls[-1] == (client_method, expected_args)
+        
+        # Renames also delete the document stored under the old path
+        if change.old_path:
+            old_doc_id = mock_processor._get_document_id(change.old_path)
+            assert mock_processor.client.calls[0] == ("delete_document", (old_doc_id,))
+    
+    def test_process_changes_dry_run(self, mock_processor):
+        """Test processing changes in dry run mode"""
+        mock_processor.config.dry_run = True
         
-        assert result is True
-        mock_processor.client.insert_document.assert_called_once()
-        
-        # Check the call arguments
-        args, kwargs = mock_processor.client.insert_document.call_args
-        assert args[0] == "# New document"
-        assert kwargs["metadata"]["file_path"] == "docs/new.md"
-        assert kwargs["metadata"]["change_type"] == "added"
-    
-    def test_handle_modified_file(self, mock_processor):
-        """Test handling of modified files"""
-        change = FileChange(
-            path="docs/updated.md",
-            change_type=ChangeType.MODIFIED,
-            content="# Updated document",
-            content_hash="def456"
-        )
+        changes = [
+            FileChange("docs/test.md", ChangeType.ADDED, content="Test"),
+            FileChange("docs/other.md", ChangeType.MODIFIED, content="Other")
+        ]
         
-        mock_processor.client.update_document.return_value = True
+        results = mock_processor.process_changes(changes)
         
-        result = mock_processor._handle_modified_file(
-            change, 
-            "doc123"
-        )
+        assert results["processed"] == 2
+        assert results["failed"] == 0
+        assert results["skipped"] == 0
         
-        assert result is True
-        mock_processor.client.update_document.assert_called_once_with(
-            "doc123",
-            "# Updated document",
-            {
-                "file_path": "docs/updated.md",
-                "change_type": "modified",
-                "content_hash": "def456"
-            }
-        )
+        # Should not call API methods in dry run
+        assert mock_processor.client.calls == []
     
-    def test_handle_deleted_file(self, mock_processor):
-        """Test handling of deleted files"""
-        change = FileChange(
-            path="docs/deleted.md",
-            change_type=ChangeType.DELETED
-        )
+    def test_process_changes_concurrent(self, mock_processor):
+        """Test that concurrently processed changes are all counted"""
+        mock_processor.client.delete_ret = Exception("API error")
         
-        mock_processor.client.delete_document.return_value = True
-        
-        result = mock_processor._handle_deleted_file(
-            change, 
-            "doc123"
-        )
+        changes = [
+            FileChange(f"docs/doc{i}.md", ChangeType.ADDED, content=f"Doc {i}")
+            for i in range(20)
+        ]
+        changes.append(FileChange("docs/changed.md", ChangeType.MODIFIED, content="Changed"))
+        changes.append(FileChange("docs/gone.md", ChangeType.DELETED))
         
-        assert result is True
-        mock_processor.client.delete_document.assert_called_once_with("doc123")
-    
-    def test_handle_renamed_file(self, mock_processor):
-        """Test handling of renamed files"""
-        change = FileChange(
-            path="docs/new_name.md",
-            change_type=ChangeType.RENAMED,
-            old_path="docs/old_name.md",
-            content="# Renamed document",
-            content_hash="ghi789"
-        )
+        results = mock_processor.process_changes(changes)
         
-        mock_processor.client.delete_document.return_value = True
-        mock_processor.client.insert_document.return_value = True
+        assert results["processed"] == 21
+        assert results["failed"] == 1
+        # Added files are sent batch_size at a time
+        assert len(mock_processor.client.called("insert_documents")) == 2
+        assert mock_processor.client.called("insert_document") == []
+    
+    def test_process_changes_in_parallel(self, mock_processor):
+        """Test that API calls for independent changes overlap"""
+        # Every call waits for a partner, so serial processing would break the barrier
+        barrier = threading.Barrier(2, timeout=5)
         
-        result = mock_processor._handle_renamed_file(
-            change, 
-            "new_doc_id"
-        )
+        mock_processor.client.on_call = lambda name: barrier.wait()
         
-        assert result is True
+        changes = [
+            FileChange(f"docs/doc{i}.md", ChangeType.MODIFIED, content=f"Doc {i}")
+            for i in range(50)
+        ]
         
-        # Should delete old document
-        old_doc_id = mock_processor._get_document_id("docs/old_name.md")
-        mock_processor.client.delete_document.assert_called_once_with(old_doc_id)
+        results = mock_processor.process_changes(changes)
         
-        # Should insert new document
-        mock_processor.client.insert_document.assert_called_once()
+        assert results == {"processed": 50, "failed": 0, "skipped": 0}
+        assert len(mock_processor.client.called("update_document")) == 50
     
-    def test_process_changes_dry_run(self, mock_processor):
-        """Test processing changes in dry run mode"""
-        mock_processor.config.dry_run = True
+    def test_process_changes_skips_unchanged(self, mock_processor):
+        """Test that changes already synced with the same content are skipped"""
         
         changes = [
-            FileChange("docs/test.md", ChangeType.ADDED, content="Test"),
-            FileChange("docs/other.md", ChangeType.MODIFIED, content="Other")
+            FileChange("docs/same.md", ChangeType.MODIFIED, content="Same", unchanged=True),
+            FileChange("docs/edited.md", ChangeType.MODIFIED, content="Edited")
         ]
         
         results = mock_processor.process_changes(changes)
         
-        assert results["processed"] == 2
-        assert results["failed"] == 0
-        assert results["skipped"] == 0
+        assert results == {"processed": 1, "failed": 0, "skipped": 1}
+        assert len(mock_processor.client.called("update_document")) == 1
+    
+    def test_insert_batch_falls_back_on_failure(self, mock_processor):
+        """Test that documents rejected in a batch are retried individually"""
+        mock_processor.client.insert_batch_ret = [True, False]
         
-        # Should not call API methods in dry run
-        assert not mock_processor.client.insert_document.called
-        assert not mock_processor.client.update_document.called
+        batch = [
+            FileChange("docs/a.md", ChangeType.ADDED, content="A"),
+            FileChange("docs/b.md", ChangeType.ADDED, content="B")
+        ]
+        
+        assert mock_processor._insert_batch(batch) == [True, True]
+        retried = mock_processor.client.called("insert_document")
+        assert len(retried) == 1
+        assert retried[0][0] == "B"
+    
+    def test_insert_batch_request_failure_is_not_retried(self, mock_processor):
+        """Test that a failed batch request marks every document failed without single retries"""
+        mock_processor.client.insert_batch_ret = None
+        
+        batch = [
+            FileChange("docs/a.md", ChangeType.ADDED, content="A"),
+            FileChange("docs/b.md", ChangeType.ADDED, content="B")
+        ]
+        
+        assert mock_processor._insert_batch(batch) == [False, False]
+        assert mock_processor.client.called("insert_document") == []
 
 
 class TestDocSyncSystem:
     """Test the main system coordinator"""
     
     @pytest.fixture
-    def mock_system(self):
+    def mock_system(self, tmp_path, default_config):
         """Create a system with all mocked dependencies"""
-        config = Config.default()
+        config = replace(default_config)
         
         with patch('docsync.GitAnalyzer') as mock_git, \
              patch('docsync.LightRAGClient') as mock_client, \
              patch('docsync.DocumentProcessor') as mock_processor:
             
-            system = DocSyncSystem(config)
+            system = DocSyncSystem(config, str(tmp_path))
             system.git_analyzer = mock_git.return_value
+            system.git_analyzer.resolve_commit.return_value = None
             system.lightrag_client = mock_client.return_value
             system.processor = mock_processor.return_value
             
@@ -449,19 +851,23 @@ class TestDocSyncSystem:
         mock_changes = [
             FileChange("docs/test.md", ChangeType.ADDED, content="Test")
         ]
-        mock_system.git_analyzer.get_changes_since_commit.return_value = mock_changes
+        mock_system.git_analyzer.commit_windows.return_value = [("abc123", "def456")]
+        mock_system.git_analyzer.iter_changes.return_value = iter(mock_changes)
+        mock_system.git_analyzer.materialize_content.side_effect = lambda change, rev: change
         
         # Mock processing results
-        mock_system.processor.process_changes.return_value = {
+        mock_system.processor.process_changes_async = AsyncMock(return_value={
             "processed": 1, "failed": 0, "skipped": 0
-        }
+        })
         
         results = mock_system.sync_since_commit("abc123")
         
         # Verify calls
         mock_system.lightrag_client.health_check.assert_called_once()
-        mock_system.git_analyzer.get_changes_since_commit.assert_called_once_with("abc123")
-        mock_system.processor.process_changes.assert_called_once_with(mock_changes)
+        mock_system.git_analyzer.commit_windows.assert_called_once_with("abc123")
+        mock_system.git_analyzer.iter_changes.assert_called_once_with(["abc123", "def456"])
+        mock_system.processor.process_changes_async.assert_awaited_once()
+        assert mock_system.processor.process_changes_async.call_args[0][0] == mock_changes
         
         assert results["processed"] == 1
     
@@ -471,88 +877,196 @@ class TestDocSyncSystem:
         
         with pytest.raises(RuntimeError, match="LightRAG API is not accessible"):
             mock_system.sync_since_commit("abc123")
+    
+    def test_sync_since_head_is_noop(self, mock_system):
+        """Test that syncing since the current HEAD skips the API and the diff"""
+        head = "0123456789abcdef0123456789abcdef01234567"
+        
+        with patch.object(DocSyncSystem, '_rev_parse', return_value=head):
+            results = mock_system.sync_since_commit("HEAD")
+        
+        assert results == {"processed": 0, "failed": 0, "skipped": 0}
+        assert not mock_system.lightrag_client.health_check.called
+        assert not mock_system.git_analyzer.commit_windows.called
+    
+    def test_sync_records_last_synced_head(self, mock_system):
+        """Test that a successful sync remembers the HEAD it reached"""
+        head = "0123456789abcdef0123456789abcdef01234567"
+        mock_system.lightrag_client.health_check.return_value = True
+        mock_system.git_analyzer.commit_windows.return_value = [("abc123", head)]
+        mock_system.git_analyzer.iter_changes.return_value = iter([])
+        
+        with patch.object(DocSyncSystem, '_rev_parse', side_effect=lambda rev: head if rev == "HEAD" else "abc123"):
+            mock_system.sync_since_commit("abc123")
+        
+        assert HashCache.load(mock_system.cache_path).last_synced_head == head
+    
+    def test_sync_without_windows_keeps_last_synced_head(self, mock_system):
+        """Test that HEAD isn't recorded when no diff was applied to reach it"""
+        head = "0123456789abcdef0123456789abcdef01234567"
+        mock_system.lightrag_client.health_check.return_value = True
+        mock_system.git_analyzer.commit_windows.return_value = []
+        
+        with patch.object(DocSyncSystem, '_rev_parse', side_effect=lambda rev: head if rev == "HEAD" else "abc123"):
+            mock_system.sync_since_commit("abc123")
+        
+        assert HashCache.load(mock_system.cache_path).last_synced_head is None
+
+
+class TestSyncPipeline:
+    """Test each sync mode through the real pipeline on a real repository"""
+    
+    @pytest.fixture
+    def synced_repo(self, _integration_baseline, tmp_path, default_config):
+        """A clone of the integration baseline and a system syncing it to a StubClient"""
+        repo = clone_repo(_integration_baseline, tmp_path / "repo")
+        config = replace(default_config, exclude_patterns=[*default_config.exclude_patterns, "**/temp/**"])
+        system = DocSyncSystem(config, str(repo))
+        system.lightrag_client.close()
+        system.lightrag_client = system.processor.client = StubClient()
+        yield repo, system
+        system.close()
+    
+    def test_sync_staged_changes(self, synced_repo):
+        """Test that staged documents are sent, and skipped once their hashes are cached"""
+        repo, system = synced_repo
+        (repo / "docs" / "new.md").write_text("# New")
+        (repo / "docs" / "readme.md").write_text("# Updated")
+        (repo / "docs" / "temp" / "scratch.md").write_text("# Excluded")
+        (repo / "src" / "notes.md").write_text("# Not watched")
+        subprocess.run(["git", "add", "-A"], cwd=repo, check=True)
+        
+        assert system.sync_staged_changes() == {"processed": 2, "failed": 0, "skipped": 0}
+        
+        client = system.processor.client
+        assert [args[0] for args in client.called("insert_documents")] == [["# New"]]
+        assert [args[:2] for args in client.called("update_document")] == [(_doc_id("docs/readme.md"), "# Updated")]
+        
+        assert system.sync_staged_changes() == {"processed": 0, "failed": 0, "skipped": 2}
+    
+    def test_sync_between_commits(self, synced_repo, integration_head):
+        """Test that adds, edits and deletes between two commits reach the API"""
+        repo, system = synced_repo
+        commit_files(repo, {
+            "docs/new.md": "# New",
+            "docs/readme.md": "# Updated",
+            "docs/api/auth.md": None,
+            "docs/temp/cache.md": "# Excluded",
+        }, "Change docs")
+        
+        totals = system.sync_between_commits(integration_head, "HEAD")
+        
+        assert totals == {"processed": 3, "failed": 0, "skipped": 0}
+        client = system.processor.client
+        assert [args[0] for args in client.called("insert_documents")] == [["# New"]]
+        assert client.called("delete_document") == [(_doc_id("docs/api/auth.md"),)]
+    
+    def test_sync_since_commit(self, synced_repo, integration_head):
+        """Test that a since-commit sync covers every commit and records the new HEAD"""
+        repo, system = synced_repo
+        commit_files(repo, {"docs/new.md": "# New"}, "Add a page")
+        commit_files(repo, {"docs/new.md": "# New, revised", "docs/readme.md": "# Updated"}, "Revise")
+        head = head_commit(repo)
+        
+        assert system.sync_since_commit(integration_head) == {"processed": 2, "failed": 0, "skipped": 0}
+        assert HashCache.load(system.cache_path).last_synced_head == head
+        
+        calls = len(system.processor.client.calls)
+        assert system.sync_since_commit(head) == {"processed": 0, "failed": 0, "skipped": 0}
+        assert len(system.processor.client.calls) == calls
+    
+    def test_sync_since_non_ancestor(self, synced_repo, integration_head):
+        """Test that a base rewritten out of HEAD's history is still synced up to HEAD"""
+        repo, system = synced_repo
+        commit_files(repo, {"docs/dropped.md": "# Dropped"}, "Rewritten away")
+        orphaned = head_commit(repo)
+        subprocess.run(["git", "update-ref", "refs/heads/main", integration_head], cwd=repo, check=True)
+        commit_files(repo, {"docs/kept.md": "# Kept"}, "Replacement")
+        head = head_commit(repo)
+        
+        assert system.sync_since_commit(orphaned) == {"processed": 2, "failed": 0, "skipped": 0}
+        assert HashCache.load(system.cache_path).last_synced_head == head
+        
+        client = system.processor.client
+        assert [args[0] for args in client.called("delete_document")] == [_doc_id("docs/dropped.md")]
+    
+    def test_reader_failure_does_not_hang(self, synced_repo):
+        """Test that a failing content read ends the sync even with the producer blocked on a full queue"""
+        repo, system = synced_repo
+        system.QUEUE_SIZE = 1
+        for i in range(20):
+            (repo / "docs" / f"page{i}.md").write_text(f"# Page {i}")
+        subprocess.run(["git", "add", "-A"], cwd=repo, check=True)
+        
+        errors = []
+        
+        def sync():
+            try:
+                system.sync_staged_changes()
+            except RuntimeError as e:
+                errors.append(e)
+        
+        def fail_read(change, rev):
+            # Give the producer time to fill the queue and block on it
+            time.sleep(0.2)
+            raise RuntimeError("read failed")
+        
+        with patch.object(system.git_analyzer, "materialize_content", side_effect=fail_read):
+            # A daemon thread, so a regression fails the test instead of hanging the run
+            worker = threading.Thread(target=sync, daemon=True)
+            worker.start()
+            worker.join(timeout=10)
+        
+        assert not worker.is_alive()
+        assert [str(e) for e in errors] == ["read failed"]
 
 
 class TestIntegration:
     """Integration tests using real Git repository"""
     
     @pytest.fixture
-    def integration_repo(self):
+    def integration_repo(self, _integration_baseline, tmp_path):
         """Create a more complex test repository"""
-        temp_dir = tempfile.mkdtemp()
-        repo_path = Path(temp_dir)
-        
-        # Initialize git repo
-        subprocess.run(["git", "init"], cwd=repo_path, check=True, capture_output=True)
-        subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=repo_path, check=True)
-        subprocess.run(["git", "config", "user.name", "Test User"], cwd=repo_path, check=True)
-        
-        # Create directory structure
-        (repo_path / "docs").mkdir()
-        (repo_path / "docs" / "api").mkdir()
-        (repo_path / "src").mkdir()
-        
-        # Create various files
-        files = {
-            "docs/readme.md": "# Main Documentation",
-            "docs/api/auth.md": "# Authentication",
-            "docs/guide.markdown": "# User Guide",
-            "src/main.py": "# Python source",
-            "docs/temp/cache.md": "# Temp file"
-        }
-        
-        for file_path, content in files.items():
-            full_path = repo_path / file_path
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            full_path.write_text(content)
-        
-        # Initial commit
-        subprocess.run(["git", "add", "."], cwd=repo_path, check=True)
-        subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=repo_path, check=True)
-        
-        yield repo_path
-        
-        # Cleanup
-        shutil.rmtree(temp_dir)
+        return clone_repo(_integration_baseline, tmp_path / "repo")
     
     @patch('docsync.LightRAGClient')
-    def test_end_to_end_workflow(self, mock_client_class, integration_repo):
+    def test_end_to_end_workflow(self, mock_client_class, integration_repo, integration_head):
         """Test complete end-to-end workflow"""
         # Setup config
         config = Config.default()
         config.exclude_patterns.append("**/temp/**")
         
-        # Mock LightRAG client
-        mock_client = Mock()
-        mock_client.health_check.return_value = True
-        mock_client.insert_document.return_value = True
-        mock_client.update_document.return_value = True
-        mock_client.delete_document.return_value = True
-        mock_client_class.return_value = mock_client
+        # Stub LightRAG client
+        client = StubClient()
+        mock_client_class.return_value = client
         
         # Create system
         system = DocSyncSystem(config, str(integration_repo))
         
-        # Get initial commit
-        result = subprocess.run(
-            ["git", "rev-parse", "HEAD"], 
-            cwd=integration_repo, 
-            capture_output=True, 
-            text=True, 
-            check=True
-        )
-        initial_commit = result.stdout.strip()
-        
-        # Make various changes
-        (integration_repo / "docs" / "new.md").write_text("# New Document")
-        (integration_repo / "docs" / "readme.md").write_text("# Updated Main Documentation")
-        (integration_repo / "docs" / "api" / "auth.md").unlink()  # Delete file
-        
-        # Move file (simulate rename)
-        (integration_repo / "docs" / "guide.markdown").rename(
-            integration_repo / "docs" / "user-guide.md"
-        )
-        
-        # Add changes to git
-        subprocess.run(["git", "add", "."], cwd=integration_repo, check=True)
-        subprocess.run(["git", "commit", "-m", "
\ No newline at end of file
+        # Add, edit, delete and move (same content, so git sees a rename) in one commit
+        commit_files(integration_repo, {
+            "docs/new.md": "# New Document",
+            "docs/readme.md": "# Updated Main Documentation",
+            "docs/api/auth.md": None,
+            "docs/guide.markdown": None,
+            "docs/user-guide.md": "# User Guide",
+            "docs/temp/cache.md": "# Changed temp file",
+            "src/main.py": "# Changed source",
+        }, "Reorganize documentation")
+        
+        # Sync everything since the baseline
+        results = system.sync_since_commit(integration_head)
+        
+        assert results == {"processed": 4, "failed": 0, "skipped": 0}
+        assert [args[0] for args in client.called("insert_documents")] == [["# New Document"]]
+        assert [args[:2] for args in client.called("update_document")] == [
+            (_doc_id("docs/readme.md"), "# Updated Main Documentation")
+        ]
+        assert sorted(client.called("delete_document")) == sorted([
+            (_doc_id("docs/api/auth.md"),), (_doc_id("docs/guide.markdown"),)
+        ])
+        assert [args[0] for args in client.called("insert_document")] == ["# User Guide"]
+        
+        # The synced HEAD is remembered for the next run
+        assert HashCache.load(system.cache_path).last_synced_head == head_commit(integration_repo)
+        system.close()